@@ -0,0 +1,67 @@
+import numpy as np
+
+# IDX trades in lots of 100 shares
+LOT_SIZE = 100
+MAX_POSITION_WEIGHT = 0.4
+
+
+def allocate_lots(prices, scores, budget, lot_size=LOT_SIZE, max_weight=MAX_POSITION_WEIGHT, caps=None):
+    """Whole lots to buy per ticker for a score-weighted split of `budget`.
+
+    Targets are score-proportional and capped at max_weight of the budget (never
+    below one lot) and at `caps`, in Rupiah, when given. Capital above a ticker's cap
+    is water-filled pro rata over the uncapped tickers, the targets are rounded down
+    to whole lots once, and the leftover buys at most one more lot per ticker, furthest
+    below target first. Runtime depends on the number of tickers, not on the budget.
+    """
+    prices = np.asarray(prices, dtype=float)
+    scores = np.clip(np.nan_to_num(np.asarray(scores, dtype=float)), 0, None)
+    lots = np.zeros(len(prices), dtype=np.int64)
+    valid = np.isfinite(prices) & (prices > 0)
+    if budget <= 0 or not valid.any():
+        return lots
+
+    weights = np.where(valid, scores, 0.0)
+    if weights.sum() <= 0:
+        weights = valid.astype(float)
+    weights = weights / weights.sum()
+    # Zero-score holdings get nothing, not even leftover capital
+    valid &= weights > 0
+
+    lot_cost = np.where(valid, prices * lot_size, np.inf)
+    # A weight cap below an equal split, or below a single lot, would leave capital idle
+    # no matter what, so it always admits one lot; explicit caps are hard limits
+    max_lots = np.maximum(np.floor(budget * max(max_weight, 1 / valid.sum()) / lot_cost), 1)
+    if caps is not None:
+        max_lots = np.minimum(max_lots, np.floor(np.nan_to_num(np.asarray(caps, dtype=float), nan=np.inf) / lot_cost))
+    max_lots = np.where(valid, max_lots, 0).astype(np.int64)
+
+    # Water-fill: each round pins the tickers whose pro-rata share exceeds their cap and
+    # re-spreads the rest, so it ends after at most one round per ticker
+    cap = np.where(valid, max_lots * np.where(valid, lot_cost, 0), 0.0)
+    capped = ~valid
+    target = np.zeros(len(prices))
+    while True:
+        free = ~capped
+        share = weights[free].sum()
+        if share <= 0:
+            break
+        scale = max(budget - cap[capped].sum(), 0.0) / share
+        over = free & (weights * scale >= cap)
+        if not over.any():
+            target[free] = weights[free] * scale
+            break
+        capped |= over
+    target[capped] = cap[capped]
+
+    lots = np.minimum(np.floor(target / lot_cost), max_lots).astype(np.int64)
+    remaining = budget - lots @ np.where(valid, lot_cost, 0)
+
+    # Each uncapped ticker is now less than one lot below target, so one pass suffices
+    candidates = np.flatnonzero(valid & (lots < max_lots))
+    shortfall = target[candidates] - lots[candidates] * lot_cost[candidates]
+    for i in candidates[np.argsort(-shortfall, kind='stable')]:
+        if lot_cost[i] <= remaining:
+            lots[i] += 1
+            remaining -= lot_cost[i]
+    return lots
@@ -1,20 +1,16 @@
 import streamlit as st
 from ui import UIHelper
 from api_manager import APIKeyManager
-from yfinance_provider import YFinanceProvider
-from fmp_provider import FMPProvider
-from portfolio import Portfolio
-from stock_analyzer import StockAnalyzer
-from sentiment_analyzer import SentimentAnalyzer
-from news_provider import NewsProvider
-from risk_profiler import RiskProfiler
+import resources
+
+# Page modules (and the plotting/ML/NLP libraries behind them) are imported inside
+# the menu branch that renders them, so a cold start only pays for the page opened.
+# startup_benchmark.py measures the per-menu import cost.
 
 class App:
     def __init__(self):
         self.ui = UIHelper()
         self.api_manager = APIKeyManager()
-        self.yfinance_provider = YFinanceProvider()
-        self.risk_profiler = RiskProfiler()
 
     def run(self):
         st.set_page_config(
@@ -27,19 +23,27 @@ class App:
         self.ui.inject_responsive_css()
         
         selected_menu, uploaded_file = self.ui.display_sidebar(self.api_manager)
+        ledger, use_ledger = self.ui.display_ledger_selector()
         
         fmp_api_key = self.api_manager.get_fmp_api_key()
         news_api_key = self.api_manager.get_news_api_key()
 
-        fmp_provider = FMPProvider(fmp_api_key)
-        news_provider = NewsProvider(news_api_key)
+        from portfolio import Portfolio
+        
+        yfinance_provider = resources.get_yfinance_provider()
+        fmp_provider = resources.get_fmp_provider(fmp_api_key)
+        self.ui.display_cache_stats(fmp_provider.cache_stats())
         
-        portfolio = Portfolio(self.yfinance_provider, fmp_provider)
-        stock_analyzer = StockAnalyzer(self.yfinance_provider, fmp_provider)
-        sentiment_analyzer = SentimentAnalyzer(news_provider)
+        portfolio = Portfolio(yfinance_provider, fmp_provider)
 
         if uploaded_file:
             portfolio.load_from_file(uploaded_file)
+        elif use_ledger and ledger.summary()['transactions']:
+            # Only when the user picked their own ledger as the portfolio source
+            portfolio.load_from_ledger(ledger)
+        
+        if resources.NEWS_INGEST_THREAD and not portfolio.df.empty:
+            resources.get_news_ingestor(news_api_key).watch(portfolio.df['Ticker'].tolist())
 
         st.title("Stock Analysis Toolkit Pro+")
 
@@ -51,6 +55,9 @@ class App:
         
         elif selected_menu == "Prediksi Harga Saham":
             if not portfolio.df.empty:
+                stock_analyzer = resources.get_stock_analyzer(fmp_api_key, news_api_key)
+                if st.checkbox("Tampilkan screening sinyal seluruh portofolio"):
+                    stock_analyzer.get_signal_screen(portfolio.df['Ticker'].tolist())
                 selected_ticker = st.selectbox("Pilih Saham", portfolio.df['Ticker'].tolist())
                 stock_analyzer.get_prediction(selected_ticker)
             else:
@@ -60,22 +67,22 @@ class App:
             if not portfolio.df.empty and fmp_api_key:
                 selected_ticker = st.selectbox("Pilih Saham", portfolio.df['Ticker'].tolist())
                 clean_ticker = selected_ticker.replace('.JK', '')
-                stock_analyzer.get_valuation(clean_ticker)
+                resources.get_stock_analyzer(fmp_api_key, news_api_key).get_valuation(clean_ticker)
             elif not fmp_api_key:
                 st.warning("Silakan masukkan API Key FMP di sidebar")
             else:
                 st.warning("Silakan upload file portfolio terlebih dahulu")
         
         elif selected_menu == "Market News & Sentiment":
-            sentiment_analyzer.display_news_feed()
+            resources.get_sentiment_analyzer(news_api_key).display_news_feed()
 
         elif selected_menu == "Tracking Modal":
-            portfolio.capital_tracking()
+            portfolio.capital_tracking(ledger)
 
         elif selected_menu == "Rekomendasi Pembelian":
             if not portfolio.df.empty and fmp_api_key:
                 portfolio.update_realtime_data()
-                stock_analyzer.investment_simulation(portfolio.df)
+                resources.get_stock_analyzer(fmp_api_key, news_api_key).investment_simulation(portfolio.df)
             elif not fmp_api_key:
                 st.warning("Silakan masukkan API Key FMP di sidebar")
             else:
@@ -84,6 +91,13 @@ class App:
         elif selected_menu == "Smart Assistant & Rekomendasi AI":
             st.header("🤖 Smart Assistant & Rekomendasi AI")
             
+            stock_analyzer = resources.get_stock_analyzer(fmp_api_key, news_api_key)
+            risk_profiler = resources.get_risk_profiler()
+            
+            # Every tab body runs on each rerun, so refresh prices once for all of them
+            if not portfolio.df.empty:
+                portfolio.update_realtime_data()
+            
             tab1, tab2, tab3 = st.tabs([
                 "Saham Undervalued",
                 "Rekomendasi Diversifikasi",
@@ -97,23 +111,24 @@ class App:
                 st.subheader("Rekomendasi Diversifikasi Portofolio")
                 st.info("Dapatkan rekomendasi alokasi portofolio berdasarkan profil risiko Anda:")
                 
-                risk_profile = self.risk_profiler.get_user_profile()
+                risk_profile = risk_profiler.get_user_profile()
                 
                 if risk_profile and not portfolio.df.empty:
-                    portfolio.update_realtime_data()
-                    self.risk_profiler.get_diversification_recommendation(portfolio.df, risk_profile)
+                    risk_profiler.get_diversification_recommendation(portfolio.df, risk_profile, yfinance_provider, fmp_provider)
             
             with tab3:
                 st.subheader("Analisis Risiko Portofolio")
                 st.info("Skor risiko portofolio Anda berdasarkan karakteristik saham:")
                 
                 if not portfolio.df.empty and fmp_api_key:
-                    portfolio.update_realtime_data()
-                    self.risk_profiler.calculate_portfolio_risk_score(portfolio.df, fmp_provider)
+                    risk_profiler.calculate_portfolio_risk_score(portfolio.df, fmp_provider)
+                
+                if not portfolio.df.empty:
+                    risk_profiler.display_risk_engine(portfolio.df, yfinance_provider)
 
         elif selected_menu == "Komparasi Saham":
             if fmp_api_key:
-                stock_analyzer.stock_comparison(portfolio.df)
+                resources.get_stock_analyzer(fmp_api_key, news_api_key).stock_comparison(portfolio.df)
             else:
                 st.warning("Silakan masukkan API Key FMP di sidebar")
 
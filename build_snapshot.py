@@ -0,0 +1,31 @@
+import argparse
+import os
+from cache import TTLCache
+from fmp_provider import FMPProvider
+from fundamentals_snapshot import SNAPSHOT_PATH, build_snapshot
+
+# Nightly job, e.g. cron: 0 2 * * * FMP_API_KEY=... python build_snapshot.py
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the IDX fundamentals snapshot used by the app")
+    parser.add_argument("--api-key", default=os.environ.get("FMP_API_KEY"))
+    parser.add_argument("--exchange", default="IDX")
+    parser.add_argument("--output", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("FMP API key is required (--api-key or FMP_API_KEY)")
+
+    # Memory-only cache so the nightly run always sees fresh numbers
+    fmp_provider = FMPProvider(args.api_key, cache=TTLCache(db_path=None))
+
+    def report(done, total):
+        print(f"\r{done}/{total} saham", end="", flush=True)
+
+    snapshot = build_snapshot(fmp_provider, args.exchange, args.output, report)
+    print(f"\nSnapshot tersimpan: {len(snapshot)} saham -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from storage import data_path
+
+
+class TTLCache:
+    """Two-tier cache: an in-process LRU in front of an optional SQLite file."""
+
+    def __init__(self, max_entries=4096, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._db is None and self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+
+            db = self._connect()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self.disk_hits += 1
+                        return value
+                    db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl, persist=True):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            db = self._connect() if persist else None
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM cache")
+                db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+
+# Process-wide cache for FMP responses; set KILO_FMP_CACHE_DB="" to keep it in memory only
+fmp_cache = TTLCache(
+    max_entries=4096,
+    db_path=os.environ.get("KILO_FMP_CACHE_DB", data_path("fmp_cache.sqlite3")) or None
+)
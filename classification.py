@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+BLUE_CHIP = "Saham Blue Chip"
+INCOME = "Saham Pendapatan"
+GROWTH = "Saham Growth"
+SPECULATIVE = "Saham Spekulatif"
+UNCLASSIFIED = "Lainnya"
+CATEGORIES = [BLUE_CHIP, INCOME, GROWTH, SPECULATIVE, UNCLASSIFIED]
+
+# Checked in order, first match wins. mktCap in Rupiah, yields and growth as fractions.
+#   Blue chip: large, dividend paying and not wildly volatile
+#   Income:    high yield, or a steady payer in a defensive sector
+#   Growth:    revenue growing fast
+CLASSIFICATION_RULES = {
+    'blue_chip_min_cap': 5e13,
+    'blue_chip_max_beta': 1.5,
+    'income_min_yield': 0.04,
+    'defensive_min_yield': 0.02,
+    'growth_min_revenue': 0.15,
+}
+DEFENSIVE_SECTORS = ('Consumer Defensive', 'Utilities', 'Communication Services', 'Real Estate')
+CLASSIFICATION_FIELDS = ['sector', 'mktCap', 'beta', 'lastDiv', 'dividendYield', 'growthRevenue', 'price']
+
+
+def ticker_key(tickers):
+    """Normalized lookup key, so BBCA and BBCA.JK are the same stock"""
+    return pd.Series(tickers).astype(str).str.strip().str.upper().str.replace('.JK', '', regex=False)
+
+
+def classify(df, rules=CLASSIFICATION_RULES):
+    """Category per row of a frame with CLASSIFICATION_FIELDS columns (missing ones count as NaN)"""
+    def column(name):
+        if name not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+
+    market_cap = column('mktCap')
+    beta = column('beta')
+    # The ratios endpoint can lag a year behind; fall back to last dividend over price
+    dividend_yield = column('dividendYield')
+    dividend_yield = np.where(np.isnan(dividend_yield), column('lastDiv') / column('price'), dividend_yield)
+    pays_dividend = np.nan_to_num(dividend_yield) > 0
+    defensive = df['sector'].isin(DEFENSIVE_SECTORS).to_numpy() if 'sector' in df.columns else False
+
+    categories = np.select(
+        [
+            (market_cap >= rules['blue_chip_min_cap']) & pays_dividend
+            & ~(beta > rules['blue_chip_max_beta']),
+            (dividend_yield >= rules['income_min_yield'])
+            | (defensive & (dividend_yield >= rules['defensive_min_yield'])),
+            column('growthRevenue') >= rules['growth_min_revenue'],
+            np.isnan(market_cap),
+        ],
+        [BLUE_CHIP, INCOME, GROWTH, UNCLASSIFIED],
+        default=SPECULATIVE
+    )
+    return pd.Categorical(categories, categories=CATEGORIES)
+
+
+_live_categories = {}
+
+
+def classify_tickers(tickers, snapshot=None, fmp_provider=None):
+    """Category per ticker (Series aligned with `tickers`).
+
+    The snapshot's precomputed lookup table covers the IDX universe; tickers it
+    misses are classified from FMP once per process and remembered.
+    """
+    keys = ticker_key(tickers)
+    lookup = snapshot.categories if snapshot is not None else pd.Series(dtype=object)
+    missing = [key for key in keys.unique() if key not in lookup.index and key not in _live_categories]
+
+    if missing and fmp_provider is not None and fmp_provider.api_key:
+        bulk_data = fmp_provider.get_fmp_data_bulk(missing, ('ratios', 'growth', 'quote'))
+        rows = {
+            ticker: {**fmp_data['profile'], **fmp_data['ratios'], **fmp_data['growth'], **fmp_data['quote']}
+            for ticker, fmp_data in bulk_data.items() if fmp_data
+        }
+        if rows:
+            live = pd.DataFrame.from_dict(rows, orient='index').reindex(columns=CLASSIFICATION_FIELDS)
+            _live_categories.update(zip(live.index, classify(live)))
+
+    lookup = pd.concat([lookup.astype(object), pd.Series(_live_categories, dtype=object)])
+    return pd.Series(keys.map(lookup).fillna(UNCLASSIFIED).to_numpy(), index=getattr(tickers, 'index', None))
@@ -0,0 +1,201 @@
+from collections import defaultdict, deque
+import numpy as np
+import pandas as pd
+
+METHODS = ('FIFO', 'Average Cost')
+DAYS_PER_YEAR = 365.0
+XIRR_ITERATIONS = 100
+XIRR_TOLERANCE = 1e-10
+
+
+def match_lots(transactions, method='FIFO'):
+    """Matches sells against earlier buys in one pass over a date-ordered ledger.
+
+    FIFO keeps a deque of open lots per ticker; average cost keeps one running
+    (shares, cost, share-weighted acquisition day) triple. Sells beyond the shares
+    held (history that starts mid-position) are booked at zero P/L and counted in
+    'unmatched_shares'. Market value for the time-weighted return is tracked at the
+    latest traded price of each ticker, so no price history is needed.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown cost basis method: {method}")
+    fifo = method == 'FIFO'
+
+    days = pd.to_datetime(transactions['Date']).to_numpy(dtype='datetime64[D]').astype(np.int64).tolist()
+    tickers = transactions['Ticker'].tolist()
+    is_buy = (transactions['Action'] == 'Beli').tolist()
+    shares = transactions['Shares'].astype(float).tolist()
+    prices = transactions['Price'].astype(float).tolist()
+
+    lots = defaultdict(deque)
+    average = defaultdict(lambda: [0.0, 0.0, 0.0])
+    held = defaultdict(float)
+    marks = {}
+    realized = []
+    unmatched = 0.0
+    value = 0.0
+    value_after_flow = 0.0
+    growth = 1.0
+
+    for day, ticker, buy, quantity, price in zip(days, tickers, is_buy, shares, prices):
+        # Revalue the ticker at its new trade price, then close the sub-period before the flow
+        value += held[ticker] * (price - marks.get(ticker, price))
+        marks[ticker] = price
+        if value_after_flow > 0:
+            growth *= value / value_after_flow
+
+        if buy:
+            if fifo:
+                lots[ticker].append([quantity, price, day])
+            else:
+                position = average[ticker]
+                position[0] += quantity
+                position[1] += quantity * price
+                position[2] += quantity * day
+            held[ticker] += quantity
+            value += quantity * price
+        else:
+            matched = min(quantity, held[ticker])
+            cost = 0.0
+            age = 0.0
+            if fifo:
+                queue = lots[ticker]
+                remaining = matched
+                while remaining > 1e-9 and queue:
+                    lot = queue[0]
+                    take = min(lot[0], remaining)
+                    cost += take * lot[1]
+                    age += take * (day - lot[2])
+                    lot[0] -= take
+                    remaining -= take
+                    if lot[0] <= 1e-9:
+                        queue.popleft()
+            elif matched > 0:
+                position = average[ticker]
+                fraction = matched / position[0]
+                cost = position[1] * fraction
+                age = matched * day - position[2] * fraction
+                position[0] -= matched
+                position[1] -= cost
+                position[2] -= position[2] * fraction
+            excess = quantity - matched
+            unmatched += excess
+            held[ticker] -= matched
+            value -= matched * price
+            realized.append((day, ticker, quantity, quantity * price, cost + excess * price,
+                             age / matched if matched > 0 else 0.0))
+        value_after_flow = value
+
+    open_rows = []
+    for ticker, quantity in held.items():
+        if quantity <= 1e-9:
+            continue
+        if fifo:
+            cost = sum(lot[0] * lot[1] for lot in lots[ticker])
+            acquired = sum(lot[0] * lot[2] for lot in lots[ticker]) / quantity
+        else:
+            cost = average[ticker][1]
+            acquired = average[ticker][2] / quantity
+        open_rows.append((ticker, quantity, cost, cost / quantity, acquired, marks[ticker]))
+
+    realized = pd.DataFrame(realized, columns=['Date', 'Ticker', 'Shares', 'Proceeds', 'Cost Basis', 'Holding Days'])
+    realized['Date'] = realized['Date'].to_numpy(dtype='datetime64[D]')
+    realized['Realized P/L'] = realized['Proceeds'] - realized['Cost Basis']
+
+    # Investor cash flows per day: buys are paid in, sells paid out
+    flows = np.where(is_buy, -1.0, 1.0) * np.asarray(shares) * np.asarray(prices)
+    flow_days, inverse = np.unique(np.asarray(days, dtype=np.int64), return_inverse=True)
+    return {
+        'method': method,
+        'realized': realized,
+        'open': pd.DataFrame(open_rows, columns=['Ticker', 'Shares', 'Cost Basis', 'Avg Price',
+                                                 'Acquired Day', 'Last Trade Price']),
+        'unmatched_shares': unmatched,
+        'flow_days': flow_days,
+        'flows': np.bincount(inverse, weights=flows) if len(flows) else np.zeros(0),
+        'twr_growth': growth,
+        'value_after_flow': value_after_flow,
+    }
+
+
+def xirr(days, amounts):
+    """Annual money-weighted return of dated cash flows (days as integers), NaN if undefined"""
+    amounts = np.asarray(amounts, dtype=float)
+    if len(amounts) < 2 or not (amounts > 0).any() or not (amounts < 0).any():
+        return np.nan
+    years = (np.asarray(days, dtype=float) - days[0]) / DAYS_PER_YEAR
+
+    def npv(rate):
+        return amounts @ (1 + rate) ** -years
+
+    rate = 0.1
+    for _ in range(XIRR_ITERATIONS):
+        discount = (1 + rate) ** -years
+        value = amounts @ discount
+        slope = -(amounts * years) @ (discount / (1 + rate))
+        if slope == 0:
+            break
+        step = value / slope
+        rate -= step
+        if rate <= -1 or not np.isfinite(rate):
+            break
+        if abs(step) < XIRR_TOLERANCE:
+            return rate
+
+    # Newton left the domain or stalled: bisect a bracketing interval instead
+    low, high = -0.9999, 1.0
+    while npv(high) > 0 and high < 1e6:
+        high *= 2
+    if np.sign(npv(low)) == np.sign(npv(high)):
+        return np.nan
+    for _ in range(200):
+        middle = (low + high) / 2
+        if np.sign(npv(middle)) == np.sign(npv(low)):
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def performance(matched, prices=None, as_of=None):
+    """Values the open lots of a match_lots result and adds the portfolio-level returns.
+
+    `prices` maps ticker to current price; tickers without one use their last traded price.
+    """
+    as_of = pd.Timestamp('today') if as_of is None else pd.Timestamp(as_of)
+    today = as_of.to_datetime64().astype('datetime64[D]').astype(np.int64)
+
+    positions = matched['open'].copy()
+    current = positions['Ticker'].map(pd.Series(prices if prices is not None else {}, dtype=float))
+    positions['Current Price'] = current.fillna(positions['Last Trade Price'])
+    positions['Market Value'] = positions['Shares'] * positions['Current Price']
+    positions['Unrealized P/L'] = positions['Market Value'] - positions['Cost Basis']
+    positions['Holding Days'] = today - positions['Acquired Day']
+    positions = positions.drop(columns=['Acquired Day', 'Last Trade Price'])
+
+    market_value = positions['Market Value'].sum()
+    growth = matched['twr_growth']
+    if matched['value_after_flow'] > 0:
+        growth *= market_value / matched['value_after_flow']
+
+    flow_days, flows = matched['flow_days'], matched['flows']
+    if market_value > 0:
+        if len(flow_days) and flow_days[-1] == today:
+            flows = flows.copy()
+            flows[-1] += market_value
+        else:
+            flow_days = np.append(flow_days, today)
+            flows = np.append(flows, market_value)
+
+    realized = matched['realized']
+    return {
+        'open': positions,
+        'realized': realized,
+        'realized_pl': realized['Realized P/L'].sum(),
+        'unrealized_pl': positions['Unrealized P/L'].sum(),
+        'market_value': market_value,
+        'cost_basis': positions['Cost Basis'].sum(),
+        'twr': growth - 1,
+        'xirr': xirr(flow_days, flows),
+        'unmatched_shares': matched['unmatched_shares'],
+    }
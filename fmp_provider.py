@@ -1,62 +1,231 @@
+import threading
 import requests
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from cache import fmp_cache
 from data_provider import DataProvider
+from rate_limiter import RateLimitExceeded, call_with_backoff, get_limiter, parse_retry_after
+
+FMP_BASE_URL = "https://financialmodelingprep.com/api/v3"
+REQUEST_TIMEOUT = 15
+MAX_WORKERS = 4
+# FMP accepts comma-separated symbol lists on these endpoints
+BATCH_ENDPOINTS = ('profile', 'quote')
+BULK_CHUNK_SIZE = 50
+
+# Endpoints fetched after the profile lookup succeeds: key -> (path, params)
+FOLLOW_UP_ENDPOINTS = {
+    'ratios': ('ratios', {'period': 'annual'}),
+    'cashflow': ('cash-flow-statement', {'period': 'annual'}),
+    'quote': ('quote', {}),
+    'growth': ('income-statement-growth', {'period': 'annual'}),
+}
+
+# Cache lifetime in seconds per endpoint; annual figures rarely move, quotes do
+CACHE_TTL = {
+    'profile': 24 * 60 * 60,
+    'ratios': 24 * 60 * 60,
+    'cash-flow-statement': 24 * 60 * 60,
+    'income-statement-growth': 24 * 60 * 60,
+    'quote': 30,
+    'stock-screener': 24 * 60 * 60,
+}
+PERSISTENT_MIN_TTL = 60 * 60
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    # One pooled keep-alive session per process, shared by every FMPProvider
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS * 4)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
 
 class FMPProvider(DataProvider):
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache=fmp_cache):
         self.api_key = api_key
+        self.session = get_session()
+        self.cache = cache
+        self.limiter = get_limiter('fmp')
 
     def get_data(self, **kwargs):
         # This method is not used directly, but required by the abstract class
         pass
 
+    def _request(self, path, ticker, params=None):
+        query = dict(params or {})
+        query['apikey'] = self.api_key
+        url = f"{FMP_BASE_URL}/{path}/{ticker}"
+        return call_with_backoff(self.limiter, self._send, url, query)
+
+    def _send(self, url, query):
+        response = self.session.get(url, params=query, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 429:
+            raise RateLimitExceeded(retry_after=parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+    def _cache_key(self, path, ticker):
+        return f"fmp:{path}:{ticker}"
+
+    def _cache_store(self, path, ticker, value):
+        ttl = CACHE_TTL.get(path, PERSISTENT_MIN_TTL)
+        self.cache.set(self._cache_key(path, ticker), value, ttl, persist=ttl >= PERSISTENT_MIN_TTL)
+
+    def _get_first(self, path, ticker, params=None):
+        cached = self.cache.get(self._cache_key(path, ticker))
+        if cached is not None:
+            return cached
+        data = self._request(path, ticker, params).json()
+        first = data[0] if data else {}
+        self._cache_store(path, ticker, first)
+        return first
+
+    def _get_batch(self, path, tickers):
+        response = self._request(path, ",".join(tickers))
+        if response.status_code != 200:
+            raise RuntimeError(f"Error {response.status_code}: {response.text}")
+        items = {item.get('symbol'): item for item in response.json() or []}
+        # Symbols missing from a batch response have no data; cache that too
+        return {ticker: items.get(ticker, {}) for ticker in tickers}
+
+    def _get_many(self, path, tickers, executor):
+        results = {}
+        missing = []
+        for ticker in tickers:
+            cached = self.cache.get(self._cache_key(path, ticker))
+            if cached is not None:
+                results[ticker] = cached
+            else:
+                missing.append(ticker)
+
+        chunks = [missing[i:i + BULK_CHUNK_SIZE] for i in range(0, len(missing), BULK_CHUNK_SIZE)]
+        for batch in executor.map(lambda chunk: self._get_batch(path, chunk), chunks):
+            for ticker, item in batch.items():
+                self._cache_store(path, ticker, item)
+                results[ticker] = item
+        return results
+
+    def fetch_fmp_data_bulk(self, tickers, parts=None):
+        """Like get_fmp_data_bulk but raises instead of writing to the page, so it is
+        safe to call from worker threads. `parts` limits which follow-up endpoints
+        are fetched; skipped ones come back as empty dicts."""
+        tickers = list(dict.fromkeys(tickers))
+        parts = set(parts) if parts is not None else set(FOLLOW_UP_ENDPOINTS)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            profiles = self._get_many('profile', tickers, executor)
+            found = [ticker for ticker in tickers if profiles.get(ticker)]
+            quotes = self._get_many('quote', found, executor) if 'quote' in parts else {}
+
+            # Ratios, cash flow and growth have no multi-symbol form on FMP
+            futures = {
+                (ticker, key): executor.submit(self._get_first, path, ticker, params)
+                for ticker in found
+                for key, (path, params) in FOLLOW_UP_ENDPOINTS.items()
+                if key in parts and path not in BATCH_ENDPOINTS
+            }
+            results = {key: future.result() for key, future in futures.items()}
+
+        bulk_data = {}
+        for ticker in tickers:
+            if not profiles.get(ticker):
+                bulk_data[ticker] = None
+                continue
+            bulk_data[ticker] = {
+                'profile': profiles[ticker],
+                'ratios': results.get((ticker, 'ratios'), {}),
+                'cashflow': results.get((ticker, 'cashflow'), {}),
+                'quote': quotes.get(ticker, {}),
+                'growth': results.get((ticker, 'growth'), {})
+            }
+        return bulk_data
+
+    def get_fmp_data_bulk(self, tickers, parts=None):
+        """Fetches get_fmp_data-shaped dicts for many tickers, keyed by ticker"""
+        if not self.api_key:
+            st.warning("FMP API Key is not set.")
+            return {}
+
+        if not tickers:
+            return {}
+
+        try:
+            return self.fetch_fmp_data_bulk(tickers, parts)
+        except Exception as e:
+            st.error(f"Error fetching FMP data: {str(e)}")
+            return {}
+
+    def get_stock_screener(self, exchange):
+        if not self.api_key:
+            st.warning("FMP API Key is not set.")
+            return []
+
+        cache_key = self._cache_key('stock-screener', exchange)
+        stocks = self.cache.get(cache_key)
+        if stocks is None:
+            query = {'exchange': exchange, 'apikey': self.api_key}
+            response = call_with_backoff(self.limiter, self._send, f"{FMP_BASE_URL}/stock-screener", query)
+            if response.status_code != 200:
+                st.error(f"Error fetching FMP screener data: Error {response.status_code}: {response.text}")
+                return []
+            stocks = response.json() or []
+            self.cache.set(cache_key, stocks, CACHE_TTL['stock-screener'])
+        return stocks
+
+    def cache_stats(self):
+        return self.cache.stats()
+
     def get_fmp_data(self, ticker):
         if not self.api_key:
             st.warning("FMP API Key is not set.")
             return None
         try:
-            profile_url = f"https://financialmodelingprep.com/api/v3/profile/{ticker}?apikey={self.api_key}"
-            profile_response = requests.get(profile_url)
-            
-            if profile_response.status_code != 200:
-                error_msg = f"Error {profile_response.status_code}: {profile_response.text}"
-                st.error(f"Error fetching FMP profile data: {error_msg}")
-                return None
-                
-            profile_data = profile_response.json()
-            
-            if not profile_data:
+            profile = self.cache.get(self._cache_key('profile', ticker))
+            if profile is None:
+                profile_response = self._request('profile', ticker)
+
+                if profile_response.status_code != 200:
+                    error_msg = f"Error {profile_response.status_code}: {profile_response.text}"
+                    st.error(f"Error fetching FMP profile data: {error_msg}")
+                    return None
+
+                profile_data = profile_response.json()
+                profile = profile_data[0] if profile_data else {}
+                self._cache_store('profile', ticker, profile)
+
+            if not profile:
                 st.warning(f"Data perusahaan tidak ditemukan untuk {ticker}")
                 return None
-            
-            ratios_url = f"https://financialmodelingprep.com/api/v3/ratios/{ticker}?period=annual&apikey={self.api_key}"
-            ratios_response = requests.get(ratios_url)
-            ratios_data = ratios_response.json()
-            
-            cashflow_url = f"https://financialmodelingprep.com/api/v3/cash-flow-statement/{ticker}?period=annual&apikey={self.api_key}"
-            cashflow_response = requests.get(cashflow_url)
-            cashflow_data = cashflow_response.json()
-            
-            quote_url = f"https://financialmodelingprep.com/api/v3/quote/{ticker}?apikey={self.api_key}"
-            quote_response = requests.get(quote_url)
-            quote_data = quote_response.json()
-            
-            growth_url = f"https://financialmodelingprep.com/api/v3/income-statement-growth/{ticker}?period=annual&apikey={self.api_key}"
-            growth_response = requests.get(growth_url)
-            growth_data = growth_response.json()
-            
+
+            # Worker threads only do I/O; any exception is re-raised here on .result()
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = {
+                    key: executor.submit(self._get_first, path, ticker, params)
+                    for key, (path, params) in FOLLOW_UP_ENDPOINTS.items()
+                }
+                results = {key: future.result() for key, future in futures.items()}
+
             fmp_data = {
-                'profile': profile_data[0] if profile_data else {},
-                'ratios': ratios_data[0] if ratios_data else {},
-                'cashflow': cashflow_data[0] if cashflow_data else {},
-                'quote': quote_data[0] if quote_data else {},
-                'growth': growth_data[0] if growth_data else {}
+                'profile': profile,
+                'ratios': results['ratios'],
+                'cashflow': results['cashflow'],
+                'quote': results['quote'],
+                'growth': results['growth']
             }
             return fmp_data
-            
+
         except Exception as e:
             if "0" in str(e):
                 st.error("Koneksi ke API FMP gagal. Silakan cek koneksi internet Anda.")
             else:
                 st.error(f"Error fetching FMP data: {str(e)}")
-            return None
\ No newline at end of file
+            return None
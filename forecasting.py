@@ -0,0 +1,183 @@
+import glob
+import hashlib
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+from storage import data_dir
+
+FORECAST_HORIZON = 21
+CONFIDENCE = 0.95
+MAX_TRAINING_WORKERS = 2
+# A fit whose worker died (OOM, native crash) is retried on a fresh pool after this long
+CRASH_RETRY_SECONDS = 10 * 60
+DIGEST_LENGTH = 16
+
+
+class ArimaForecaster:
+    name = "ARIMA"
+
+    def fit(self, y):
+        import pmdarima as pm
+        return pm.auto_arima(y, seasonal=False, suppress_warnings=True, error_action='ignore')
+
+    def forecast(self, model, y, horizon):
+        mean, interval = model.predict(n_periods=horizon, return_conf_int=True, alpha=1 - CONFIDENCE)
+        return np.asarray(mean), np.asarray(interval)[:, 0], np.asarray(interval)[:, 1]
+
+
+class ProphetForecaster:
+    name = "Prophet"
+
+    def _frame(self, y):
+        return pd.DataFrame({'ds': y.index.tz_localize(None) if y.index.tz else y.index, 'y': y.values})
+
+    def fit(self, y):
+        from prophet import Prophet
+        model = Prophet(interval_width=CONFIDENCE, daily_seasonality=False)
+        model.fit(self._frame(y))
+        return model
+
+    def forecast(self, model, y, horizon):
+        future = model.make_future_dataframe(periods=horizon, freq='B', include_history=False)
+        prediction = model.predict(future)
+        return prediction['yhat'].to_numpy(), prediction['yhat_lower'].to_numpy(), prediction['yhat_upper'].to_numpy()
+
+
+FORECASTERS = {
+    ArimaForecaster.name: ArimaForecaster,
+    ProphetForecaster.name: ProphetForecaster,
+}
+
+
+def history_hash(close):
+    return hashlib.sha256(pd.util.hash_pandas_object(close).to_numpy().tobytes()).hexdigest()[:DIGEST_LENGTH]
+
+
+def _stem(model_name, ticker):
+    return os.path.join(data_dir("forecasts", model_name.lower()), ticker.replace('/', '_'))
+
+
+def _paths(model_name, ticker, digest):
+    stem = f"{_stem(model_name, ticker)}-{digest}"
+    return f"{stem}.forecast.pkl", f"{stem}.model.pkl"
+
+
+def _versions(model_name, ticker, kind):
+    # Exactly <ticker>-<digest>, so BBCA never picks up the files of BBCA-W
+    return glob.glob(f"{glob.escape(_stem(model_name, ticker))}-{'[0-9a-f]' * DIGEST_LENGTH}.{kind}.pkl")
+
+
+def _fit_and_store(model_name, ticker, close, horizon):
+    # Runs in a worker process; models are fitted on log prices so bands stay positive
+    forecaster = FORECASTERS[model_name]()
+    y = np.log(close)
+    model = forecaster.fit(y)
+    mean, lower, upper = forecaster.forecast(model, y, horizon)
+
+    start = close.index[-1] + pd.offsets.BDay(1)
+    forecast = pd.DataFrame({
+        'Prediksi': np.exp(mean),
+        'Batas Bawah': np.exp(lower),
+        'Batas Atas': np.exp(upper)
+    }, index=pd.bdate_range(start=start, periods=horizon, tz=close.index.tz))
+
+    digest = history_hash(close)
+    forecast_path, model_path = _paths(model_name, ticker, digest)
+    for path, payload in ((model_path, model), (forecast_path, forecast)):
+        with open(f"{path}.tmp", 'wb') as f:
+            pickle.dump(payload, f)
+        os.replace(f"{path}.tmp", path)
+
+    # Older versions of this ticker/model are no longer needed
+    for old in _versions(model_name, ticker, 'forecast') + _versions(model_name, ticker, 'model'):
+        if old not in (forecast_path, model_path):
+            os.remove(old)
+    return forecast_path
+
+
+_executor = None
+# One entry per (model, ticker): (digest, future, executor, submit time). A new bar
+# replaces it, and a successful fit removes it, so this stays bounded by the tickers
+_pending = {}
+# Reentrant: a done-callback runs inline when the future has already finished
+_lock = threading.RLock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn keeps Streamlit's threads out of the children
+        _executor = ProcessPoolExecutor(max_workers=MAX_TRAINING_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def _reset_executor(executor):
+    global _executor
+    if _executor is executor:
+        _executor = None
+        executor.shutdown(wait=False)
+
+
+def _finished(key, future):
+    # A successful fit is served from disk from now on, so its entry is not needed
+    if future.cancelled() or future.exception() is not None:
+        return
+    with _lock:
+        entry = _pending.get(key)
+        if entry is not None and entry[1] is future:
+            del _pending[key]
+
+
+def _load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def get_forecast(model_name, ticker, close, horizon=FORECAST_HORIZON):
+    """Returns (forecast, status). status is 'ready', 'training' (a stale forecast may
+    still be returned) or 'error: ...'. Never blocks on model fitting."""
+    digest = history_hash(close)
+    forecast_path, _ = _paths(model_name, ticker, digest)
+    if os.path.exists(forecast_path):
+        return _load(forecast_path), 'ready'
+
+    key = (model_name, ticker)
+    with _lock:
+        entry = _pending.get(key)
+        if entry is not None and entry[0] != digest:
+            entry = None
+        elif entry is not None and entry[1].done() and isinstance(entry[1].exception(), BrokenProcessPool) \
+                and time.time() - entry[3] >= CRASH_RETRY_SECONDS:
+            entry = None
+        if entry is None:
+            executor = _get_executor()
+            try:
+                future = executor.submit(_fit_and_store, model_name, ticker, close, horizon)
+            except (BrokenProcessPool, RuntimeError) as e:
+                _reset_executor(executor)
+                return None, f"error: {e}"
+            _pending[key] = (digest, future, executor, time.time())
+            future.add_done_callback(lambda done, key=key: _finished(key, done))
+        else:
+            _, future, executor, _ = entry
+            if future.done():
+                # A failed fit stays as the ticker's entry so a broken model is not retrained
+                # on every rerun; the next bar replaces it
+                error = future.exception()
+                if error is not None:
+                    if isinstance(error, BrokenProcessPool):
+                        # A dead worker breaks the whole pool; the next fit starts a new one
+                        _reset_executor(executor)
+                    return None, f"error: {error}"
+                _pending.pop(key, None)
+                return _load(future.result()), 'ready'
+
+    stale = sorted(_versions(model_name, ticker, 'forecast'), key=os.path.getmtime)
+    return (_load(stale[-1]) if stale else None), 'training'
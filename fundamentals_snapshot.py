@@ -0,0 +1,143 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from classification import classify, ticker_key
+from scoring import VALUATION_THRESHOLDS, score_valuation
+from storage import data_path
+
+SNAPSHOT_PATH = os.environ.get("KILO_SNAPSHOT_PATH", data_path("fundamentals.parquet"))
+# Older snapshots are ignored and the app falls back to live FMP calls
+SNAPSHOT_MAX_AGE_DAYS = 7
+SNAPSHOT_CHUNK_SIZE = 50
+
+PROFILE_FIELDS = ['companyName', 'sector', 'industry', 'mktCap', 'beta', 'lastDiv']
+RATIO_FIELDS = ['priceEarningsRatio', 'priceToBookRatio', 'returnOnEquity', 'netProfitMargin',
+                'dividendYield', 'debtEquityRatio']
+GROWTH_FIELDS = ['growthRevenue']
+QUOTE_FIELDS = ['price']
+
+OPERATORS = ('<', '<=', '>', '>=', '==')
+
+
+class FundamentalsSnapshot:
+    """Read-only columnar snapshot of fundamentals with sorted per-column indexes"""
+
+    def __init__(self, df, built_at=None):
+        self.df = df.set_index('symbol', drop=False) if 'symbol' in df.columns else df
+        self.built_at = built_at
+        self._indexes = {}
+        self._categories = None
+        # Screener symbols carry the exchange suffix (BBCA.JK); callers may pass either form
+        keys = pd.Series(self.df.index, index=ticker_key(self.df.index).to_numpy())
+        self._symbols = keys[~keys.index.duplicated()]
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        if not os.path.exists(path):
+            return None
+        return cls(pd.read_parquet(path), built_at=os.path.getmtime(path))
+
+    def is_fresh(self, max_age_days=SNAPSHOT_MAX_AGE_DAYS):
+        return self.built_at is not None and time.time() - self.built_at < max_age_days * 24 * 60 * 60
+
+    def _symbol(self, ticker):
+        return self._symbols.get(ticker_key([ticker]).iloc[0])
+
+    def __contains__(self, ticker):
+        return self._symbol(ticker) is not None
+
+    def __len__(self):
+        return len(self.df)
+
+    def rows(self, tickers, columns):
+        """`columns` of the snapshot rows for `tickers`, indexed by the tickers as given"""
+        symbols = [self._symbol(ticker) for ticker in tickers]
+        rows = self.df.loc[symbols, columns]
+        rows.index = list(tickers)
+        return rows
+
+    def get_ratios(self, ticker):
+        row = self.df.loc[self._symbol(ticker)]
+        return {field: row[field] for field in RATIO_FIELDS if pd.notna(row[field])}
+
+    @property
+    def categories(self):
+        """Ticker key -> category lookup table; snapshots built before classification get it computed once"""
+        if self._categories is None:
+            values = self.df['category'] if 'category' in self.df.columns else classify(self.df)
+            lookup = pd.Series(pd.Categorical(values), index=ticker_key(self.df.index).to_numpy())
+            self._categories = lookup[~lookup.index.duplicated()]
+        return self._categories
+
+    def _index(self, column):
+        if column not in self._indexes:
+            values = self.df[column].to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(values))
+            order = valid[np.argsort(values[valid], kind='stable')]
+            self._indexes[column] = (values[order], order)
+        return self._indexes[column]
+
+    def query(self, column, op, value):
+        """Rows where `column op value`, answered by binary search on the sorted index"""
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        sorted_values, order = self._index(column)
+        left = np.searchsorted(sorted_values, value, side='left')
+        right = np.searchsorted(sorted_values, value, side='right')
+        bounds = {
+            '<': (0, left),
+            '<=': (0, right),
+            '>': (right, len(sorted_values)),
+            '>=': (left, len(sorted_values)),
+            '==': (left, right),
+        }
+        start, stop = bounds[op]
+        return self.df.iloc[order[start:stop]]
+
+
+_cached_snapshot = None
+
+
+def get_snapshot(path=SNAPSHOT_PATH):
+    """Process-wide snapshot, reloaded only when the file on disk changes"""
+    global _cached_snapshot
+    if not os.path.exists(path):
+        return None
+    if _cached_snapshot is None or _cached_snapshot.built_at != os.path.getmtime(path):
+        _cached_snapshot = FundamentalsSnapshot.load(path)
+    return _cached_snapshot if _cached_snapshot.is_fresh() else None
+
+
+def build_snapshot(fmp_provider, exchange="IDX", path=SNAPSHOT_PATH, progress=None,
+                   thresholds=VALUATION_THRESHOLDS):
+    stocks = fmp_provider.get_stock_screener(exchange)
+    tickers = sorted({stock['symbol'] for stock in stocks if stock.get('symbol')})
+
+    rows = []
+    for i in range(0, len(tickers), SNAPSHOT_CHUNK_SIZE):
+        chunk = tickers[i:i + SNAPSHOT_CHUNK_SIZE]
+        bulk_data = fmp_provider.fetch_fmp_data_bulk(chunk, ('ratios', 'growth', 'quote'))
+        for ticker, fmp_data in bulk_data.items():
+            if not fmp_data:
+                continue
+            row = {'symbol': ticker}
+            for part, fields in (('profile', PROFILE_FIELDS), ('ratios', RATIO_FIELDS),
+                                 ('growth', GROWTH_FIELDS), ('quote', QUOTE_FIELDS)):
+                for field in fields:
+                    row[field] = fmp_data[part].get(field)
+            rows.append(row)
+        if progress:
+            progress(min(i + SNAPSHOT_CHUNK_SIZE, len(tickers)), len(tickers))
+
+    df = pd.DataFrame(rows, columns=['symbol', *PROFILE_FIELDS, *RATIO_FIELDS, *GROWTH_FIELDS, *QUOTE_FIELDS])
+    numeric = df.columns.difference(['symbol', 'companyName', 'sector', 'industry'])
+    df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce')
+    df['score'] = score_valuation(df, thresholds)
+    # Stored as a dictionary-encoded column, a few bytes per stock
+    df['category'] = classify(df)
+
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return FundamentalsSnapshot(df, built_at=os.path.getmtime(path))
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+import pandas as pd
+from storage import data_dir
+
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+# Stored bars newer than this are served without touching the network
+FRESH_SECONDS = 15 * 60
+# Weekends and IDX holidays mean the first bar can start a few days after the cutoff
+COVERAGE_SLACK = pd.Timedelta(days=7)
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+
+def _has_new_actions(stored, delta):
+    # Bars are back-adjusted at fetch time, so a dividend or split the stored bars have
+    # not seen yet puts the whole prefix on an outdated basis
+    columns = [column for column in ACTION_COLUMNS if column in delta.columns]
+    if not columns:
+        return False
+    seen = stored.reindex(index=delta.index, columns=columns).fillna(0)
+    return bool(((delta[columns].fillna(0) != 0) & (delta[columns].fillna(0) != seen)).any().any())
+
+
+class HistoryStore:
+    """Per-ticker daily OHLCV bars kept as Parquet files and extended with delta fetches"""
+
+    def __init__(self, root=None):
+        self.root = root or data_dir("history")
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker.replace('/', '_')}.parquet")
+
+    def load(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def save(self, ticker, hist):
+        path = self._path(ticker)
+        tmp_path = f"{path}.tmp"
+        hist.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def age(self, ticker):
+        path = self._path(ticker)
+        return time.time() - os.path.getmtime(path) if os.path.exists(path) else None
+
+    def get_history(self, ticker, period, fetch):
+        """Returns the last `period` of bars, calling fetch(period=...) or fetch(start=...) for what is missing"""
+        with self._lock(ticker):
+            stored = self.load(ticker)
+            offset = PERIOD_OFFSETS.get(period)
+
+            if stored is not None and not stored.empty:
+                cutoff = stored.index[-1] - offset if offset is not None else None
+                covered = cutoff is not None and stored.index[0] <= cutoff + COVERAGE_SLACK
+            else:
+                covered = False
+
+            if not covered:
+                hist = fetch(period=period)
+                if hist is None or hist.empty:
+                    return hist
+                if stored is not None and not stored.empty:
+                    hist = pd.concat([stored[stored.index < hist.index[0]], hist])
+                self.save(ticker, hist)
+                stored = hist
+            elif self.age(ticker) >= FRESH_SECONDS:
+                # Refetch from the last stored bar, it may still have been an open session
+                last_date = stored.index[-1]
+                delta = fetch(start=last_date.strftime('%Y-%m-%d'))
+                if delta is not None and not delta.empty and _has_new_actions(stored, delta):
+                    # Re-adjust the stored span in one fetch instead of appending across the seam
+                    delta = fetch(start=stored.index[0].strftime('%Y-%m-%d'))
+                    if delta is not None and not delta.empty:
+                        stored = delta
+                elif delta is not None and not delta.empty:
+                    stored = pd.concat([stored[stored.index < delta.index[0]], delta])
+                    stored = stored[~stored.index.duplicated(keep='last')]
+                self.save(ticker, stored)
+
+            if offset is None:
+                return stored
+            return stored[stored.index > stored.index[-1] - offset]
+
+
+history_store = HistoryStore()
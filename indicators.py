@@ -0,0 +1,287 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Vectorized indicators over a 2-D price matrix (rows = dates, columns = tickers).
+# Inputs may be DataFrames or arrays; DataFrames come back with the same labels.
+# StockAnalyzer._calculate_rsi / _calculate_macd are the pandas reference versions.
+
+TRADING_DAYS = 252
+
+
+def _as_matrix(prices):
+    if isinstance(prices, (pd.DataFrame, pd.Series)):
+        frame = prices.to_frame() if isinstance(prices, pd.Series) else prices
+        values = frame.to_numpy(dtype=float)
+
+        def wrap(result):
+            if isinstance(prices, pd.Series):
+                return pd.Series(result[:, 0], index=prices.index, name=prices.name)
+            return pd.DataFrame(result, index=frame.index, columns=frame.columns)
+        return values, wrap
+
+    values = np.asarray(prices, dtype=float)
+    if values.ndim == 1:
+        return values[:, None], lambda result: result[:, 0]
+    return values, lambda result: result
+
+
+def _rolling(values, window, func):
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        out[window - 1:] = func(windows, axis=-1)
+    return out
+
+
+def _ewm(values, alpha):
+    # Same recursion as pandas ewm(adjust=False); leading NaNs stay NaN
+    out = np.empty(values.shape)
+    prev = np.full(values.shape[1], np.nan)
+    for t in range(len(values)):
+        row = values[t]
+        prev = np.where(np.isnan(prev), row, np.where(np.isnan(row), prev, prev + alpha * (row - prev)))
+        out[t] = prev
+    return out
+
+
+def sma(prices, window):
+    values, wrap = _as_matrix(prices)
+    return wrap(_rolling(values, window, np.mean))
+
+
+def ema(prices, span):
+    values, wrap = _as_matrix(prices)
+    return wrap(_ewm(values, 2 / (span + 1)))
+
+
+def rsi(prices, window=14):
+    values, wrap = _as_matrix(prices)
+    delta = np.diff(values, axis=0, prepend=np.nan)
+    gain = np.nan_to_num(np.where(delta > 0, delta, 0.0))
+    loss = np.nan_to_num(np.where(delta < 0, -delta, 0.0))
+
+    avg_gain = _rolling(gain, window, np.mean)
+    avg_loss = _rolling(loss, window, np.mean)
+    avg_gain[avg_gain == 0] = 1e-10
+    avg_loss[avg_loss == 0] = 1e-10
+
+    return wrap(100 - 100 / (1 + avg_gain / avg_loss))
+
+
+def macd(prices, slow=26, fast=12, signal=9):
+    values, wrap = _as_matrix(prices)
+    line = _ewm(values, 2 / (fast + 1)) - _ewm(values, 2 / (slow + 1))
+    return wrap(line), wrap(_ewm(line, 2 / (signal + 1)))
+
+
+def bollinger_bands(prices, window=20, num_std=2):
+    values, wrap = _as_matrix(prices)
+    middle = _rolling(values, window, np.mean)
+    std = _rolling(values, window, lambda w, axis: np.std(w, axis=axis, ddof=1))
+    return wrap(middle), wrap(middle + num_std * std), wrap(middle - num_std * std)
+
+
+def atr(high, low, close, window=14):
+    high_values, wrap = _as_matrix(high)
+    low_values, _ = _as_matrix(low)
+    close_values, _ = _as_matrix(close)
+
+    prev_close = np.vstack([np.full((1, close_values.shape[1]), np.nan), close_values[:-1]])
+    true_range = np.fmax(
+        high_values - low_values,
+        np.fmax(np.abs(high_values - prev_close), np.abs(low_values - prev_close))
+    )
+    return wrap(_ewm(true_range, 1 / window))
+
+
+def rolling_volatility(prices, window=20, periods_per_year=TRADING_DAYS):
+    values, wrap = _as_matrix(prices)
+    log_returns = np.diff(np.log(values), axis=0, prepend=np.nan)
+    std = _rolling(log_returns, window, lambda w, axis: np.std(w, axis=axis, ddof=1))
+    return wrap(std * np.sqrt(periods_per_year))
+
+
+def signal_screen(close):
+    """One row per ticker summarising the latest indicator readings of a close matrix"""
+    if isinstance(close, pd.Series):
+        close = close.to_frame()
+
+    ma20 = sma(close, 20)
+    ma50 = sma(close, 50)
+    rsi_values = rsi(close)
+    macd_line, macd_signal = macd(close)
+    _, upper, lower = bollinger_bands(close)
+    volatility = rolling_volatility(close)
+
+    screen = pd.DataFrame({
+        'Harga': close.ffill().iloc[-1],
+        'MA20': ma20.iloc[-1],
+        'MA50': ma50.iloc[-1],
+        'RSI': rsi_values.iloc[-1],
+        'MACD Hist': (macd_line - macd_signal).iloc[-1],
+        'Bollinger Atas': upper.iloc[-1],
+        'Bollinger Bawah': lower.iloc[-1],
+        'Volatilitas': volatility.iloc[-1] * 100
+    })
+
+    uptrend = (screen['MA20'] > screen['MA50']) & (screen['Harga'] > screen['MA20'])
+    downtrend = (screen['MA20'] < screen['MA50']) & (screen['Harga'] < screen['MA20'])
+    screen['Trend'] = np.select([uptrend, downtrend], ["Naik", "Turun"], default="Netral")
+
+    buy = (screen['RSI'] < 30) | (uptrend & (screen['MACD Hist'] > 0))
+    sell = (screen['RSI'] > 70) | (downtrend & (screen['MACD Hist'] < 0))
+    screen['Sinyal'] = np.select([buy, sell], ["Beli", "Jual"], default="Tahan")
+    return screen
+
+
+# Streaming versions: O(1) per bar with a few scalars of state. revise() replaces
+# the most recent bar instead of appending, for a 5-minute bar that is still open.
+
+class StreamingSMA:
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def _value(self):
+        return self.total / self.window if len(self.values) == self.window else np.nan
+
+    def update(self, price):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(price)
+        self.total += price
+        return self._value()
+
+    def revise(self, price):
+        if not self.values:
+            return self.update(price)
+        self.total += price - self.values[-1]
+        self.values[-1] = price
+        return self._value()
+
+
+class StreamingEMA:
+    def __init__(self, span=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.value = None
+        self._prev = None
+
+    def update(self, price):
+        self._prev = self.value
+        self.value = price if self.value is None else self.value + self.alpha * (price - self.value)
+        return self.value
+
+    def revise(self, price):
+        self.value = self._prev
+        return self.update(price)
+
+
+class StreamingRSI:
+    """RSI with Wilder smoothing, seeded by the simple mean of the first window moves"""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_price = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._saved = None
+
+    def _state(self):
+        return self.prev_price, self.count, self.avg_gain, self.avg_loss
+
+    def update(self, price):
+        self._saved = self._state()
+        if self.prev_price is None:
+            self.prev_price = price
+            return np.nan
+
+        delta = price - self.prev_price
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.prev_price = price
+
+        if self.count < self.window:
+            self.count += 1
+            self.avg_gain += (gain - self.avg_gain) / self.count
+            self.avg_loss += (loss - self.avg_loss) / self.count
+            if self.count < self.window:
+                return np.nan
+        else:
+            self.avg_gain = (self.avg_gain * (self.window - 1) + gain) / self.window
+            self.avg_loss = (self.avg_loss * (self.window - 1) + loss) / self.window
+
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+    def revise(self, price):
+        if self._saved is not None:
+            self.prev_price, self.count, self.avg_gain, self.avg_loss = self._saved
+        return self.update(price)
+
+
+class StreamingMACD:
+    def __init__(self, slow=26, fast=12, signal=9):
+        self.fast = StreamingEMA(span=fast)
+        self.slow = StreamingEMA(span=slow)
+        self.signal = StreamingEMA(span=signal)
+
+    def update(self, price):
+        line = self.fast.update(price) - self.slow.update(price)
+        return line, self.signal.update(line)
+
+    def revise(self, price):
+        line = self.fast.revise(price) - self.slow.revise(price)
+        return line, self.signal.revise(line)
+
+
+INTRADAY_INTERVAL = pd.Timedelta(minutes=5)
+
+
+def is_intraday(index, interval=INTRADAY_INTERVAL):
+    """Whether a bar index is spaced at `interval`; a lone bar counts if it is not a midnight daily bar"""
+    if len(index) == 0:
+        return False
+    if len(index) > 1:
+        return index.to_series().diff().min() == interval
+    return index[0] != index[0].normalize()
+
+
+class StreamingIndicators:
+    """Per-ticker bundle fed bar by bar; bars at or before the last timestamp are revisions"""
+
+    def __init__(self):
+        self.last_timestamp = None
+        self.ma20 = StreamingSMA(20)
+        self.ma50 = StreamingSMA(50)
+        self.rsi = StreamingRSI(14)
+        self.macd = StreamingMACD()
+        self.latest = {}
+
+    def update(self, timestamp, price):
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return self.latest
+        method = 'revise' if timestamp == self.last_timestamp else 'update'
+        self.last_timestamp = timestamp
+
+        macd_line, macd_signal = getattr(self.macd, method)(price)
+        self.latest = {
+            'Harga': price,
+            'MA20': getattr(self.ma20, method)(price),
+            'MA50': getattr(self.ma50, method)(price),
+            'RSI': getattr(self.rsi, method)(price),
+            'MACD': macd_line,
+            'Signal': macd_signal
+        }
+        return self.latest
+
+    def update_many(self, close):
+        # Only bars from the last seen timestamp onward are touched
+        if self.last_timestamp is not None:
+            close = close[close.index >= self.last_timestamp]
+        for timestamp, price in close.items():
+            self.update(timestamp, float(price))
+        return self.latest
@@ -0,0 +1,319 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import pandas as pd
+from allocation import LOT_SIZE
+from storage import data_path
+
+RECENT_LIMIT = 100
+# Each user/portfolio gets its own ledger file, chosen by a secret ledger id entered in
+# the app. The id is the only access control, so it must be too long to guess.
+LEDGER_ID_MIN_LENGTH = 16
+LEDGER_ID_MAX_LENGTH = 128
+MAX_OPEN_LEDGERS = 32
+# Single-user deployments can opt into one fixed ledger for every session
+SHARED_LEDGER_DB = os.environ.get("KILO_LEDGER_DB")
+FINGERPRINT_CHUNK_SIZE = 500
+LEDGER_COLUMNS = ['Date', 'Ticker', 'Action', 'Shares', 'Price']
+
+# Header aliases seen in broker exports, lower-cased; the first match wins
+BROKER_COLUMNS = {
+    'Date': ['date', 'tanggal', 'trade date', 'tanggal transaksi', 'transaction date'],
+    'Ticker': ['ticker', 'kode saham', 'kode', 'stock', 'symbol', 'saham'],
+    'Action': ['action', 'aksi', 'side', 'type', 'jenis', 'b/s', 'buy/sell'],
+    'Shares': ['shares', 'lembar', 'jumlah lembar', 'qty', 'quantity', 'volume'],
+    'Lots': ['lot', 'lots', 'jumlah lot'],
+    'Price': ['price', 'harga', 'harga per lembar', 'avg price', 'done price'],
+}
+ACTIONS = {'beli': 'Beli', 'buy': 'Beli', 'b': 'Beli', 'jual': 'Jual', 'sell': 'Jual', 's': 'Jual'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, ticker TEXT NOT NULL, action TEXT NOT NULL,
+    shares REAL NOT NULL, price REAL NOT NULL, amount REAL NOT NULL, cumulative REAL NOT NULL,
+    fingerprint TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date, id);
+CREATE INDEX IF NOT EXISTS idx_transactions_ticker ON transactions (ticker, date, id);
+CREATE TABLE IF NOT EXISTS balances (date TEXT PRIMARY KEY, cumulative REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS positions (
+    ticker TEXT PRIMARY KEY, transactions INTEGER NOT NULL, bought_shares REAL NOT NULL,
+    sold_shares REAL NOT NULL, purchases REAL NOT NULL, sales REAL NOT NULL,
+    first_date TEXT NOT NULL, last_date TEXT NOT NULL
+);
+"""
+
+
+def _clean_number(values):
+    # "Rp 10.000" style exports use dots for thousands; plain numbers pass through
+    text = values.astype(str).str.replace(r'[Rp\s]', '', regex=True)
+    text = text.where(~text.str.fullmatch(r'-?\d{1,3}(\.\d{3})+(,\d+)?'),
+                      text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+
+
+def _parse_dates(values):
+    # ISO dates must not go through dayfirst, which would swap 2024-03-10 into October
+    text = values.astype(str).str.strip()
+    iso = text.str.match(r'^\d{4}-\d{2}-\d{2}')
+    dates = pd.to_datetime(text.where(iso).str[:10], format='%Y-%m-%d', errors='coerce')
+    local = pd.to_datetime(text.where(~iso), errors='coerce', dayfirst=True, format='mixed')
+    return dates.fillna(local)
+
+
+def parse_broker_csv(source):
+    """Normalizes a broker trade export (CSV or XLSX) to LEDGER_COLUMNS.
+
+    Raises ValueError when a required column cannot be found or no row is usable.
+    """
+    name = getattr(source, 'name', str(source))
+    # Everything as text, so "4.000" reaches _clean_number instead of being read as 4.0
+    if name.endswith('.xlsx'):
+        raw = pd.read_excel(source, dtype=str)
+    else:
+        raw = pd.read_csv(source, sep=None, engine='python', dtype=str)
+    headers = {str(column).strip().lower(): column for column in raw.columns}
+    found = {}
+    for column, aliases in BROKER_COLUMNS.items():
+        match = next((headers[alias] for alias in aliases if alias in headers), None)
+        if match is not None:
+            found[column] = raw[match]
+
+    missing = [column for column in ('Date', 'Ticker', 'Action', 'Price') if column not in found]
+    if 'Shares' not in found and 'Lots' not in found:
+        missing.append('Shares')
+    if missing:
+        raise ValueError(f"Kolom tidak ditemukan: {', '.join(missing)}")
+
+    df = pd.DataFrame({
+        'Date': _parse_dates(found['Date']),
+        'Ticker': found['Ticker'].str.strip().str.upper(),
+        'Action': found['Action'].str.strip().str.lower().map(ACTIONS),
+        'Shares': _clean_number(found['Shares']) if 'Shares' in found else _clean_number(found['Lots']) * LOT_SIZE,
+        'Price': _clean_number(found['Price']),
+    })
+    df = df.dropna(subset=LEDGER_COLUMNS)
+    df = df[(df['Shares'] > 0) & (df['Price'] > 0)]
+    if df.empty:
+        raise ValueError("Tidak ada transaksi yang valid di file")
+    return df
+
+
+def _fingerprints(df, occurrence=0):
+    # Re-importing an export, or importing a trade that was already entered by hand,
+    # must not double the ledger: rows are keyed by their content plus how often that
+    # content already appeared (two identical fills on one day are two trades).
+    # Broker references are not used, since hand-entered rows have none.
+    keys = df['Date'].astype(str) + '|' + df['Ticker'].astype(str) + '|' + df['Action'].astype(str)
+    for column in ('Shares', 'Price'):
+        keys = keys + '|' + df[column].astype(float).astype(str)
+    keys = keys + '|' + (keys.groupby(keys).cumcount() + occurrence).astype(str)
+    return [hashlib.sha1(key.encode('utf-8')).hexdigest() for key in keys]
+
+
+class TransactionLedger:
+    """Append-only transaction ledger. Running balances, daily balance points and
+    per-ticker aggregates are maintained on insert, so the capital page reads a
+    handful of indexed rows no matter how long the history is."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.RLock()
+        self._cost_basis = {}
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def add(self, date, ticker, action, shares, price):
+        """Records one hand-entered trade; a later broker import of the same trade is skipped"""
+        # Same normalization as parse_broker_csv, so bbca and BBCA are one position
+        row = pd.DataFrame([{
+            'Date': pd.Timestamp(date).strftime('%Y-%m-%d'), 'Ticker': str(ticker).strip().upper(),
+            'Action': action, 'Shares': float(shares), 'Price': float(price)
+        }])
+        with self._lock:
+            # A repeated manual entry is another fill, so it takes the next occurrence number
+            existing = self._connect().execute(
+                "SELECT COUNT(*) FROM transactions WHERE ticker = ? AND date = ? AND action = ? AND shares = ? "
+                "AND price = ?", row[['Ticker', 'Date', 'Action', 'Shares', 'Price']].iloc[0].tolist()
+            ).fetchone()[0]
+            return self.add_many(row, occurrence=existing)
+
+    def _known_fingerprints(self, db, fingerprints):
+        known = set()
+        for i in range(0, len(fingerprints), FINGERPRINT_CHUNK_SIZE):
+            chunk = fingerprints[i:i + FINGERPRINT_CHUNK_SIZE]
+            known.update(row[0] for row in db.execute(
+                f"SELECT fingerprint FROM transactions WHERE fingerprint IN ({','.join('?' * len(chunk))})", chunk))
+        return known
+
+    def add_many(self, df, occurrence=0):
+        """Inserts LEDGER_COLUMNS rows in date order, skipping ones already recorded; returns how many were new"""
+        if df.empty:
+            return 0
+        df = df.assign(Date=pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d'))
+        df = df.sort_values('Date', kind='stable')
+        df['Fingerprint'] = _fingerprints(df, occurrence)
+
+        with self._lock:
+            db = self._connect()
+            df = df[~df['Fingerprint'].isin(self._known_fingerprints(db, df['Fingerprint'].tolist()))]
+            df = df.drop_duplicates('Fingerprint')
+            if df.empty:
+                return 0
+            df['Amount'] = df['Shares'] * df['Price'] * df['Action'].map({'Beli': 1, 'Jual': -1})
+
+            last = db.execute("SELECT date, cumulative FROM transactions ORDER BY date DESC, id DESC LIMIT 1").fetchone()
+            start = df['Date'].iloc[0]
+            # The usual case appends after the last recorded day, so the running balance
+            # continues from the last row; a back-dated import rewrites the rows after it
+            appending = last is None or start >= last[0]
+            df['Cumulative'] = (last[1] if last else 0.0) + df['Amount'].cumsum() if appending else 0.0
+            with db:
+                db.executemany(
+                    "INSERT INTO transactions (date, ticker, action, shares, price, amount, cumulative, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    df[['Date', 'Ticker', 'Action', 'Shares', 'Price', 'Amount', 'Cumulative', 'Fingerprint']]
+                    .astype({'Shares': float, 'Price': float, 'Amount': float, 'Cumulative': float})
+                    .itertuples(index=False, name=None)
+                )
+                if appending:
+                    daily = df.groupby('Date')['Cumulative'].last()
+                    db.executemany("INSERT OR REPLACE INTO balances VALUES (?, ?)", daily.items())
+                else:
+                    self._rebalance(db, start)
+                self._update_positions(db, df)
+        return len(df)
+
+    def _rebalance(self, db, start):
+        previous = db.execute(
+            "SELECT cumulative FROM transactions WHERE date < ? ORDER BY date DESC, id DESC LIMIT 1", (start,)
+        ).fetchone()
+        balance = previous[0] if previous else 0.0
+        updates = []
+        daily = {}
+        for row_id, date, amount in db.execute(
+                "SELECT id, date, amount FROM transactions WHERE date >= ? ORDER BY date, id", (start,)).fetchall():
+            balance += amount
+            updates.append((balance, row_id))
+            daily[date] = balance
+        db.executemany("UPDATE transactions SET cumulative = ? WHERE id = ?", updates)
+        db.executemany("INSERT OR REPLACE INTO balances VALUES (?, ?)", daily.items())
+
+    def _update_positions(self, db, df):
+        buys = df['Action'] == 'Beli'
+        value = df['Shares'] * df['Price']
+        grouped = pd.DataFrame({
+            'Ticker': df['Ticker'], 'Date': df['Date'],
+            'bought': df['Shares'].where(buys, 0), 'sold': df['Shares'].where(~buys, 0),
+            'purchases': value.where(buys, 0), 'sales': value.where(~buys, 0)
+        }).groupby('Ticker').agg(
+            transactions=('Date', 'size'), bought=('bought', 'sum'), sold=('sold', 'sum'),
+            purchases=('purchases', 'sum'), sales=('sales', 'sum'), first=('Date', 'min'), last=('Date', 'max')
+        )
+        db.executemany(
+            "INSERT INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (ticker) DO UPDATE SET "
+            "transactions = transactions + excluded.transactions, "
+            "bought_shares = bought_shares + excluded.bought_shares, sold_shares = sold_shares + excluded.sold_shares, "
+            "purchases = purchases + excluded.purchases, sales = sales + excluded.sales, "
+            "first_date = MIN(first_date, excluded.first_date), last_date = MAX(last_date, excluded.last_date)",
+            [(ticker, int(row.transactions), float(row.bought), float(row.sold), float(row.purchases),
+              float(row.sales), row.first, row.last) for ticker, row in grouped.iterrows()]
+        )
+
+    def import_csv(self, source):
+        return self.add_many(parse_broker_csv(source))
+
+    def summary(self):
+        with self._lock:
+            db = self._connect()
+            transactions, purchases, sales = db.execute(
+                "SELECT COALESCE(SUM(transactions), 0), COALESCE(SUM(purchases), 0), COALESCE(SUM(sales), 0) "
+                "FROM positions"
+            ).fetchone()
+            last = db.execute("SELECT cumulative FROM balances ORDER BY date DESC LIMIT 1").fetchone()
+        return {
+            'transactions': transactions,
+            'purchases': purchases,
+            'sales': sales,
+            'balance': last[0] if last else 0.0
+        }
+
+    def positions(self):
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT ticker AS Ticker, transactions AS Transactions, bought_shares - sold_shares AS Shares, "
+                "purchases AS Purchases, sales AS Sales, first_date AS 'First Date', last_date AS 'Last Date' "
+                "FROM positions ORDER BY ticker", self._connect())
+
+    def recent(self, limit=RECENT_LIMIT):
+        """Latest transactions, newest first"""
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT date AS Date, ticker AS Ticker, action AS Action, shares AS Shares, price AS Price, "
+                "amount AS Amount, cumulative AS Cumulative FROM transactions ORDER BY date DESC, id DESC LIMIT ?",
+                self._connect(), params=(limit,))
+
+    def balance_history(self):
+        """One end-of-day running balance per trading day"""
+        with self._lock:
+            return pd.read_sql_query("SELECT date AS Date, cumulative AS Cumulative FROM balances ORDER BY date",
+                                     self._connect())
+
+    def cost_basis(self, method='FIFO'):
+        """match_lots over the whole ledger, recomputed only when an insert has raised the last id"""
+        from cost_basis import match_lots
+        with self._lock:
+            last_id = self._connect().execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+            cached = self._cost_basis.get(method)
+            if cached is None or cached[0] != last_id:
+                cached = self._cost_basis[method] = (last_id, match_lots(self.transactions(), method))
+        return cached[1]
+
+    def transactions(self, ticker=None, start=None, end=None):
+        """Transactions in date order, optionally for one ticker and/or a date range (both indexed)"""
+        query = ("SELECT date AS Date, ticker AS Ticker, action AS Action, shares AS Shares, price AS Price, "
+                 "amount AS Amount, cumulative AS Cumulative FROM transactions WHERE 1 = 1")
+        params = []
+        for clause, value in (("ticker = ?", ticker), ("date >= ?", start), ("date <= ?", end)):
+            if value is not None:
+                query += f" AND {clause}"
+                params.append(str(pd.Timestamp(value).date()) if clause != "ticker = ?" else value)
+        with self._lock:
+            return pd.read_sql_query(query + " ORDER BY date, id", self._connect(), params=params)
+
+
+_ledgers = OrderedDict()
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(ledger_id=None):
+    """Ledger for one secret ledger id, or the KILO_LEDGER_DB one when set.
+
+    The file is named after the SHA-256 of the id, so the data directory never
+    reveals the secret. Raises ValueError for ids shorter than LEDGER_ID_MIN_LENGTH.
+    """
+    if SHARED_LEDGER_DB:
+        path = SHARED_LEDGER_DB
+    elif ledger_id and LEDGER_ID_MIN_LENGTH <= len(ledger_id) <= LEDGER_ID_MAX_LENGTH:
+        digest = hashlib.sha256(ledger_id.encode('utf-8')).hexdigest()
+        path = data_path("ledgers", f"{digest}.sqlite3")
+    else:
+        raise ValueError(f"ID ledger harus {LEDGER_ID_MIN_LENGTH}-{LEDGER_ID_MAX_LENGTH} karakter")
+
+    with _ledgers_lock:
+        if path in _ledgers:
+            _ledgers.move_to_end(path)
+        else:
+            _ledgers[path] = TransactionLedger(path)
+            while len(_ledgers) > MAX_OPEN_LEDGERS:
+                _ledgers.popitem(last=False)
+        return _ledgers[path]
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+# Working memory per chunk of paths; the full path tensor is never materialised
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+# Per-day percentiles come from a histogram of log(value / initial value)
+HISTOGRAM_RANGE = 3.0
+HISTOGRAM_BINS = 4000
+
+
+class MonteCarloSimulator:
+    """Correlated portfolio return paths from daily log returns (dates x tickers).
+
+    method='gbm' draws multivariate normal log returns with the sample mean and
+    covariance (or the ones passed in); method='bootstrap' resamples whole
+    historical days, which keeps fat tails and cross-correlation as observed.
+    """
+
+    def __init__(self, returns, method='gbm', seed=None, mean=None, cov=None,
+                 max_chunk_bytes=MAX_CHUNK_BYTES, dtype=np.float32):
+        if method not in ('gbm', 'bootstrap'):
+            raise ValueError(f"Unknown simulation method: {method}")
+        self.returns = np.asarray(returns, dtype=float)
+        if self.returns.ndim == 1:
+            self.returns = self.returns[:, None]
+        self.method = method
+        self.seed = seed
+        self.max_chunk_bytes = max_chunk_bytes
+        # Paths are generated in float32 by default: half the memory, ample precision for daily returns
+        self.dtype = np.dtype(dtype)
+        self.mean = (self.returns.mean(axis=0) if mean is None else np.asarray(mean, dtype=float)).astype(self.dtype)
+        if method == 'gbm':
+            cov = np.atleast_2d(np.cov(self.returns, rowvar=False) if cov is None else cov)
+            self.chol = self._cholesky(cov).astype(self.dtype)
+        else:
+            self.samples = self.returns.astype(self.dtype)
+
+    @staticmethod
+    def _cholesky(cov):
+        try:
+            return np.linalg.cholesky(cov)
+        except np.linalg.LinAlgError:
+            # Clip negative eigenvalues from a near-singular sample covariance
+            values, vectors = np.linalg.eigh(cov)
+            return vectors * np.sqrt(np.clip(values, 1e-12, None))
+
+    def _draw(self, rng, n_paths, horizon):
+        n_assets = self.returns.shape[1]
+        if self.method == 'bootstrap':
+            days = rng.integers(0, len(self.samples), size=(n_paths, horizon))
+            return self.samples[days]
+        shocks = rng.standard_normal((n_paths, horizon, n_assets), dtype=self.dtype)
+        return self.mean + shocks @ self.chol.T
+
+    def chunk_size(self, horizon):
+        n_assets = self.returns.shape[1]
+        # Draws, cumulative sums and asset values are alive at the same time
+        return max(1, self.max_chunk_bytes // (horizon * n_assets * self.dtype.itemsize * 3))
+
+    def simulate(self, weights, initial_value, horizon=250, n_paths=10000,
+                 percentiles=DEFAULT_PERCENTILES):
+        weights = np.asarray(weights, dtype=float)
+        holdings = (initial_value * weights / weights.sum()).astype(self.dtype)
+        rng = np.random.default_rng(self.seed)
+
+        edges = np.linspace(-HISTOGRAM_RANGE, HISTOGRAM_RANGE, HISTOGRAM_BINS + 1)
+        counts = np.zeros(horizon * HISTOGRAM_BINS, dtype=np.int64)
+        losses = np.zeros(horizon, dtype=np.int64)
+        terminal = np.empty(n_paths)
+        day_offsets = np.arange(horizon) * HISTOGRAM_BINS
+
+        chunk = self.chunk_size(horizon)
+        for start in range(0, n_paths, chunk):
+            size = min(chunk, n_paths - start)
+            growth = np.exp(np.cumsum(self._draw(rng, size, horizon), axis=1))
+            values = (growth @ holdings).astype(float)
+
+            losses += (values < initial_value).sum(axis=0)
+            terminal[start:start + size] = values[:, -1]
+
+            log_ratio = np.log(values / initial_value)
+            bins = np.clip(np.searchsorted(edges, log_ratio, side='right') - 1, 0, HISTOGRAM_BINS - 1)
+            counts += np.bincount((bins + day_offsets).ravel(), minlength=counts.size)
+
+        return {
+            'percentiles': self._percentiles(counts.reshape(horizon, HISTOGRAM_BINS), edges,
+                                             n_paths, percentiles, initial_value),
+            'prob_loss': pd.Series(losses / n_paths, index=np.arange(1, horizon + 1)),
+            'terminal': terminal,
+            'prob_loss_terminal': float((terminal < initial_value).mean()),
+            'expected_terminal': float(terminal.mean()),
+            'initial_value': initial_value
+        }
+
+    @staticmethod
+    def _percentiles(counts, edges, n_paths, percentiles, initial_value):
+        cumulative = np.cumsum(counts, axis=1) / n_paths
+        columns = {}
+        for q in percentiles:
+            # Linear interpolation inside the bin where the CDF crosses q
+            idx = np.minimum((cumulative < q / 100).sum(axis=1), counts.shape[1] - 1)
+            rows = np.arange(len(counts))
+            below = np.where(idx > 0, cumulative[rows, idx - 1], 0.0)
+            in_bin = counts[rows, idx] / n_paths
+            fraction = np.divide(q / 100 - below, in_bin, out=np.full(len(counts), 0.5), where=in_bin > 0)
+            log_ratio = edges[idx] + np.clip(fraction, 0, 1) * (edges[1] - edges[0])
+            columns[f"P{q}"] = initial_value * np.exp(log_ratio)
+        return pd.DataFrame(columns, index=np.arange(1, len(counts) + 1))
+
+
+def fan_chart(result, title, yaxis_title='Nilai (Rp)'):
+    """Percentile bands of a simulate() result as a plotly figure"""
+    bands = result['percentiles']
+    columns = list(bands.columns)
+    fig = go.Figure()
+    for low, high, opacity in ((columns[0], columns[-1], 0.15), (columns[1], columns[-2], 0.3)):
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[high], line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[low], fill='tonexty', line=dict(width=0),
+                                 fillcolor=f'rgba(30, 58, 138, {opacity})', name=f'{low}-{high}'))
+    median = columns[len(columns) // 2]
+    fig.add_trace(go.Scatter(x=bands.index, y=bands[median], line=dict(color='#1e3a8a', width=2), name='Median'))
+    fig.add_hline(y=result['initial_value'], line_dash="dash", line_color="gray")
+    fig.update_layout(title=title, xaxis_title='Hari Bursa ke-', yaxis_title=yaxis_title)
+    return fig
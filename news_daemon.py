@@ -0,0 +1,138 @@
+import argparse
+import os
+import threading
+import time
+import pandas as pd
+from news_provider import NewsProvider
+from sentiment_analyzer import SentimentAnalyzer
+from sentiment_index import sentiment_index
+
+# Long-running job next to the app, e.g.:
+#   NEWS_API_KEY=... python news_daemon.py --portfolio portfolio.csv --interval 300
+# or set KILO_NEWS_INGEST=thread to run the same loop inside the app process.
+POLL_INTERVAL = 300
+MARKET_TICKER = '^GSPC'
+MARKET_QUERY = "stocks OR market OR economy"
+# Sessions re-watch their portfolio on every rerun; tickers nobody re-watched for this long are dropped
+WATCH_SECONDS = 60 * 60
+
+
+class NewsIngestor:
+    """Polls Yahoo RSS (and NewsAPI when a key is set) for the watched tickers and
+    scores each article once into the sentiment index."""
+
+    def __init__(self, news_provider, sentiment_analyzer, index=sentiment_index, interval=POLL_INTERVAL):
+        self.news_provider = news_provider
+        self.sentiment_analyzer = sentiment_analyzer
+        self.index = index
+        self.interval = interval
+        self._watched = {MARKET_TICKER: None}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, tickers, ttl=WATCH_SECONDS):
+        """Adds tickers to the polled set; every session's portfolio is kept, each until
+        `ttl` seconds after it was last watched (None keeps it for good)"""
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            for ticker in tickers:
+                if self._watched.get(ticker, 0) is not None:
+                    self._watched[ticker] = expires
+
+    @property
+    def tickers(self):
+        now = time.time()
+        with self._lock:
+            for ticker in [ticker for ticker, expires in self._watched.items() if expires is not None and expires < now]:
+                del self._watched[ticker]
+            return list(self._watched)
+
+    def _newsapi_articles(self, ticker):
+        query = MARKET_QUERY if ticker == MARKET_TICKER else ticker.replace('.JK', '')
+        return self.news_provider.fetch_news_from_newsapi(query)
+
+    def run_once(self):
+        """One polling pass; returns ({ticker: new articles indexed}, {ticker: error})"""
+        tickers = self.tickers
+        news, errors = self.news_provider.fetch_yahoo_news_bulk(tickers)
+        if self.news_provider.has_newsapi():
+            for ticker in tickers:
+                try:
+                    news[ticker] = news.get(ticker, []) + self._newsapi_articles(ticker)
+                except Exception as e:
+                    errors.setdefault(ticker, e)
+
+        fresh = {ticker: self.index.new_articles(ticker, articles) for ticker, articles in news.items()}
+        # One batch for every ticker, so a large backlog can use the scoring pool
+        sentiments = iter(self.sentiment_analyzer.analyze_many(
+            [f"{article['title']}. {article['description']}" for articles in fresh.values() for article in articles]))
+
+        added = {}
+        now = time.time()
+        for ticker, articles in fresh.items():
+            scored = [next(sentiments) for _ in articles]
+            # A failed poll must not mark the ticker as fresh with nothing in it
+            if articles or ticker not in errors:
+                added[ticker] = self.index.add(ticker, articles, scored, now)
+        self.index.prune(now)
+        return added, errors
+
+    def run_forever(self, report=None):
+        while not self._stop.is_set():
+            try:
+                added, errors = self.run_once()
+                if report:
+                    report(added, errors)
+            except Exception as e:
+                if report:
+                    report({}, {'*': e})
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="news-ingestor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def load_portfolio_tickers(path):
+    df = pd.read_excel(path) if path.endswith('.xlsx') else pd.read_csv(path)
+    return df['Ticker'].dropna().astype(str).str.strip().tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll news for portfolio tickers into the sentiment index")
+    parser.add_argument("--tickers", default="", help="Comma separated, e.g. BBCA.JK,TLKM.JK")
+    parser.add_argument("--portfolio", help="Portfolio CSV/XLSX with a Ticker column")
+    parser.add_argument("--news-api-key", default=os.environ.get("NEWS_API_KEY"))
+    parser.add_argument("--interval", type=int, default=POLL_INTERVAL, help="Seconds between polls")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+
+    tickers = [ticker.strip().upper() for ticker in args.tickers.split(",") if ticker.strip()]
+    if args.portfolio:
+        tickers += load_portfolio_tickers(args.portfolio)
+
+    news_provider = NewsProvider(args.news_api_key)
+    ingestor = NewsIngestor(news_provider, SentimentAnalyzer(news_provider), interval=args.interval)
+    ingestor.watch(tickers, ttl=None)
+
+    def report(added, errors):
+        stamp = time.strftime('%H:%M:%S')
+        print(f"[{stamp}] {sum(added.values())} artikel baru dari {len(added)} ticker")
+        for ticker, error in errors.items():
+            print(f"[{stamp}] Gagal mengambil berita {ticker}: {error}")
+
+    if args.once:
+        report(*ingestor.run_once())
+    else:
+        ingestor.run_forever(report)
+
+
+if __name__ == "__main__":
+    main()
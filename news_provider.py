@@ -1,15 +1,37 @@
+import threading
+import time
 import streamlit as st
 import feedparser
+from concurrent.futures import ThreadPoolExecutor
+from cache import TTLCache
 from data_provider import DataProvider
+from rate_limiter import RateLimitExceeded, call_with_backoff, get_limiter, parse_retry_after
 
 try:
     from newsapi.newsapi_client import NewsApiClient
 except ImportError:
     NewsApiClient = None
 
+YAHOO_FEED_URL = "https://feeds.finance.yahoo.com/rss/2.0/headline?s={ticker}&region=US&lang=en-US"
+# A feed younger than this is served from the store without any request; older
+# feeds are revalidated with ETag/Last-Modified, so unchanged ones cost a 304
+FEED_TTL = 5 * 60
+# Articles are dropped from a ticker's store this long after they were first seen
+ARTICLE_TTL = 3 * 24 * 60 * 60
+MAX_STORED_ARTICLES = 50
+MAX_ARTICLES = 10
+FEED_WORKERS = 8
+NEWSAPI_TTL = 10 * 60
+
 class NewsProvider(DataProvider):
     def __init__(self, api_key=None):
         self.api_key = api_key
+        self.limiter = get_limiter('news')
+        self.feed_limiter = get_limiter('rss')
+        # ticker -> {'etag', 'modified', 'checked_at', 'articles': {url: (first_seen, article)}}
+        self._feeds = {}
+        self._feeds_lock = threading.Lock()
+        self._newsapi_cache = TTLCache(max_entries=256)
         if NewsApiClient is None:
             st.warning("NewsAPI client is not available. News features will be limited.")
 
@@ -17,46 +39,117 @@ class NewsProvider(DataProvider):
         # This method is not used directly, but required by the abstract class
         pass
 
+    def has_newsapi(self):
+        return bool(self.api_key) and NewsApiClient is not None
+
+    def fetch_news_from_newsapi(self, query, language='en', page_size=10):
+        """Raises on errors instead of reporting them, so it is safe to call from worker threads"""
+        cache_key = f"{query}|{language}|{page_size}"
+        cached = self._newsapi_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        newsapi = NewsApiClient(api_key=self.api_key)
+        news = call_with_backoff(self.limiter, newsapi.get_everything,
+                                 q=query,
+                                 language=language,
+                                 sort_by='relevancy',
+                                 page_size=page_size)
+        articles = []
+        for article in news['articles']:
+            articles.append({
+                'title': article['title'],
+                'description': article['description'],
+                'url': article['url'],
+                'source': article['source']['name'],
+                'published_at': article.get('publishedAt') or '',
+                'content': article['content']
+            })
+        self._newsapi_cache.set(cache_key, articles, NEWSAPI_TTL)
+        return articles
+
     def get_news_from_newsapi(self, query, language='en', page_size=10):
-        if not self.api_key or NewsApiClient is None:
+        if not self.has_newsapi():
             st.warning("NewsAPI key is not set or client is not available.")
             return []
         try:
-            newsapi = NewsApiClient(api_key=self.api_key)
-            news = newsapi.get_everything(q=query,
-                                         language=language,
-                                         sort_by='relevancy',
-                                         page_size=page_size)
-            articles = []
-            for article in news['articles']:
-                articles.append({
-                    'title': article['title'],
-                    'description': article['description'],
-                    'url': article['url'],
-                    'source': article['source']['name'],
-                    'published_at': article['published_at'],
-                    'content': article['content']
-                })
-            return articles
+            return self.fetch_news_from_newsapi(query, language, page_size)
         except Exception as e:
             st.error(f"Error fetching news from NewsAPI: {str(e)}")
             return []
 
+    def _parse_feed(self, url, etag=None, modified=None):
+        feed = feedparser.parse(url, etag=etag, modified=modified)
+        if feed.get('status') == 429:
+            raise RateLimitExceeded(retry_after=parse_retry_after(feed.get('headers', {}).get('retry-after')))
+        if 'status' not in feed and feed.get('bozo'):
+            # No HTTP response at all; raising keeps the failure from being stored as an empty feed
+            raise feed.get('bozo_exception') or ValueError("Feed could not be fetched")
+        return feed
+
+    def _entry_to_article(self, entry):
+        return {
+            'title': entry.title,
+            'description': entry.summary if 'summary' in entry else '',
+            'url': entry.link,
+            'source': 'Yahoo Finance',
+            'published_at': entry.published if 'published' in entry else '',
+            'content': entry.summary if 'summary' in entry else ''
+        }
+
+    def _stored_articles(self, state):
+        # Newest first, as the feed lists them; copies, so callers can annotate them freely
+        return [dict(article) for _, article in sorted(state['articles'].values(), key=lambda item: -item[0])][:MAX_ARTICLES]
+
+    def _refresh_feed(self, ticker):
+        """Brings one ticker's article store up to date; safe to call from worker threads"""
+        now = time.time()
+        with self._feeds_lock:
+            state = self._feeds.setdefault(ticker, {'etag': None, 'modified': None, 'checked_at': 0, 'articles': {}})
+            if now - state['checked_at'] < FEED_TTL:
+                return self._stored_articles(state)
+            etag, modified = state['etag'], state['modified']
+
+        feed = call_with_backoff(self.feed_limiter, self._parse_feed, YAHOO_FEED_URL.format(ticker=ticker),
+                                 etag, modified)
+
+        with self._feeds_lock:
+            state['checked_at'] = now
+            state['etag'] = feed.get('etag', etag)
+            state['modified'] = feed.get('modified', modified)
+            if feed.get('status') != 304:
+                # Entries are listed newest first; a small offset keeps that order among equal timestamps
+                for position, entry in enumerate(feed.entries):
+                    if 'link' in entry and entry.link not in state['articles']:
+                        state['articles'][entry.link] = (now - position * 1e-3, self._entry_to_article(entry))
+            expired = [url for url, (first_seen, _) in state['articles'].items() if now - first_seen > ARTICLE_TTL]
+            for url in expired:
+                del state['articles'][url]
+            if len(state['articles']) > MAX_STORED_ARTICLES:
+                newest = sorted(state['articles'].items(), key=lambda item: -item[1][0])[:MAX_STORED_ARTICLES]
+                state['articles'] = dict(newest)
+            return self._stored_articles(state)
+
+    def fetch_yahoo_news_bulk(self, tickers):
+        """Returns ({ticker: articles}, {ticker: error}); feeds are revalidated concurrently"""
+        tickers = list(dict.fromkeys(tickers))
+        articles, errors = {}, {}
+        if not tickers:
+            return articles, errors
+        with ThreadPoolExecutor(max_workers=min(FEED_WORKERS, len(tickers))) as executor:
+            futures = {ticker: executor.submit(self._refresh_feed, ticker) for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                articles[ticker] = future.result()
+            except Exception as e:
+                articles[ticker] = []
+                errors[ticker] = e
+        return articles, errors
+
+    def get_news_from_yahoo_bulk(self, tickers):
+        articles, errors = self.fetch_yahoo_news_bulk(tickers)
+        for ticker, error in errors.items():
+            st.error(f"Error fetching news from Yahoo Finance for {ticker}: {str(error)}")
+        return articles
+
     def get_news_from_yahoo(self, ticker):
-        try:
-            news_url = f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={ticker}&region=US&lang=en-US"
-            feed = feedparser.parse(news_url)
-            articles = []
-            for entry in feed.entries[:10]:
-                articles.append({
-                    'title': entry.title,
-                    'description': entry.summary if 'summary' in entry else '',
-                    'url': entry.link,
-                    'source': 'Yahoo Finance',
-                    'published_at': entry.published if 'published' in entry else '',
-                    'content': entry.summary if 'summary' in entry else ''
-                })
-            return articles
-        except Exception as e:
-            st.error(f"Error fetching news from Yahoo Finance: {str(e)}")
-            return []
\ No newline at end of file
+        return self.get_news_from_yahoo_bulk([ticker])[ticker]
\ No newline at end of file
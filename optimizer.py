@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+from allocation import LOT_SIZE
+from risk_engine import TRADING_DAYS
+
+MODES = ('Minimum Variance', 'Maximum Sharpe', 'Hierarchical Risk Parity')
+# Default mode and per-holding weight cap for each questionnaire profile
+PROFILE_SETTINGS = {
+    "Konservatif": {'mode': 'Minimum Variance', 'max_weight': 0.15},
+    "Moderat": {'mode': 'Hierarchical Risk Parity', 'max_weight': 0.25},
+    "Agresif": {'mode': 'Maximum Sharpe', 'max_weight': 0.35},
+    "Sangat Agresif": {'mode': 'Maximum Sharpe', 'max_weight': 0.5},
+}
+RISK_FREE_RATE = 0.06
+MAX_ITERATIONS = 3000
+TOLERANCE = 1e-9
+# Risk-tolerance grid (relative to the covariance/return scale) walked to find the max-Sharpe point
+SHARPE_GRID = np.logspace(-3, 2, 8)
+SHARPE_ITERATIONS = 50
+
+
+def project_capped_simplex(v, upper):
+    """Euclidean projection onto {w : 0 <= w <= upper, sum(w) = 1}, exact in O(n log n).
+
+    sum(clip(v - tau, 0, upper)) is piecewise linear and decreasing in tau with
+    breakpoints at v and v - upper; it is evaluated at every breakpoint with
+    sorted suffix sums and tau is interpolated inside the crossing segment.
+    """
+    n = len(v)
+    a = np.sort(v)
+    b = a - upper
+    suffix = np.concatenate([np.cumsum(a[::-1])[::-1], [0.0]])
+    taus = np.sort(np.concatenate([b, a]))
+    ka = np.searchsorted(a, taus, side='right')
+    kb = np.searchsorted(b, taus, side='right')
+    # Elements kb.. sit at the cap, ka..kb-1 are strictly between the bounds
+    totals = (n - kb) * upper + suffix[ka] - suffix[kb] - taus * (kb - ka)
+    j = min(max(np.searchsorted(-totals, -1.0, side='left'), 1), len(taus) - 1)
+    span = totals[j - 1] - totals[j]
+    tau = taus[j - 1] + ((totals[j - 1] - 1.0) / span * (taus[j] - taus[j - 1]) if span > 0 else 0.0)
+    return np.clip(v - tau, 0, upper)
+
+
+def mean_variance_weights(cov, mu, risk_tolerance, upper, start=None, step=None):
+    """argmin 1/2 w'Cw - t mu'w over the capped simplex.
+
+    Accelerated projected gradient with adaptive restart; `step` (1 / largest
+    eigenvalue of cov) can be passed in when solving repeatedly on one covariance.
+    """
+    n = len(cov)
+    if step is None:
+        step = 1.0 / max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    w = project_capped_simplex(np.full(n, 1.0 / n) if start is None else start, upper)
+    y, t = w, 1.0
+    for _ in range(MAX_ITERATIONS):
+        w_next = project_capped_simplex(y - step * (cov @ y - risk_tolerance * mu), upper)
+        if np.abs(w_next - w).max() < TOLERANCE:
+            return w_next
+        if (y - w_next) @ (w_next - w) > 0:
+            # Momentum is pointing uphill: restart it
+            y, t = w_next, 1.0
+        else:
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = w_next + (t - 1) / t_next * (w_next - w)
+            t = t_next
+        w = w_next
+    return w
+
+
+def sharpe_ratio(weights, cov, mu, risk_free_rate=RISK_FREE_RATE):
+    volatility = np.sqrt(max(weights @ cov @ weights, 0.0) * TRADING_DAYS)
+    excess = weights @ mu * TRADING_DAYS - risk_free_rate
+    return excess / volatility if volatility > 0 else 0.0
+
+
+def max_sharpe_weights(cov, mu, upper, risk_free_rate=RISK_FREE_RATE):
+    """Best-Sharpe point of the capped long-only efficient frontier.
+
+    At the optimum the frontier's risk tolerance equals variance / excess return,
+    so after a coarse walk along the frontier that ratio is iterated to a fixed point.
+    """
+    daily_rf = risk_free_rate / TRADING_DAYS
+    largest = max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    step = 1.0 / largest
+    scale = largest / max(np.abs(mu).max(), 1e-12)
+    best = weights = mean_variance_weights(cov, mu, 0.0, upper, step=step)
+    best_sharpe = sharpe_ratio(best, cov, mu, risk_free_rate)
+    for risk_tolerance in SHARPE_GRID * scale:
+        weights = mean_variance_weights(cov, mu, risk_tolerance, upper, start=weights, step=step)
+        sharpe = sharpe_ratio(weights, cov, mu, risk_free_rate)
+        if sharpe > best_sharpe:
+            best, best_sharpe = weights, sharpe
+
+    weights = best
+    for _ in range(SHARPE_ITERATIONS):
+        excess = weights @ mu - daily_rf
+        if excess <= 0:
+            break
+        weights = mean_variance_weights(cov, mu, (weights @ cov @ weights) / excess, upper,
+                                        start=weights, step=step)
+        sharpe = sharpe_ratio(weights, cov, mu, risk_free_rate)
+        if sharpe <= best_sharpe + 1e-9:
+            break
+        best, best_sharpe = weights, sharpe
+    return best
+
+
+def cap_weights(weights, upper):
+    """Clips weights at upper and hands the excess to the others pro rata"""
+    weights = np.asarray(weights, dtype=float).copy()
+    for _ in range(len(weights)):
+        over = weights > upper + 1e-12
+        if not over.any():
+            break
+        excess = (weights[over] - upper).sum()
+        weights[over] = upper
+        free = weights < upper - 1e-12
+        weights[free] += excess * weights[free] / weights[free].sum()
+    return weights
+
+
+def _cluster_variance(cov, members):
+    inverse = 1 / np.diag(cov)[members]
+    inverse /= inverse.sum()
+    return inverse @ cov[np.ix_(members, members)] @ inverse
+
+
+def hrp_weights(cov, upper):
+    """Hierarchical risk parity (single-linkage correlation tree, recursive bisection)"""
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    std = np.sqrt(np.diag(cov))
+    corr = np.clip(cov / np.outer(std, std), -1, 1)
+    distance = np.sqrt((1 - corr) / 2)
+    np.fill_diagonal(distance, 0)
+    order = leaves_list(linkage(squareform(distance, checks=False), method='single'))
+
+    weights = np.ones(len(cov))
+    clusters = [order]
+    while clusters:
+        split = []
+        for cluster in clusters:
+            if len(cluster) < 2:
+                continue
+            left, right = cluster[:len(cluster) // 2], cluster[len(cluster) // 2:]
+            left_var, right_var = _cluster_variance(cov, left), _cluster_variance(cov, right)
+            alpha = 1 - left_var / (left_var + right_var)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+            split += [left, right]
+        clusters = split
+    return cap_weights(weights / weights.sum(), upper)
+
+
+def optimize_weights(cov, mu, mode, max_weight, risk_free_rate=RISK_FREE_RATE):
+    cov = np.asarray(cov, dtype=float)
+    mu = np.asarray(mu, dtype=float)
+    # The cap can never be tighter than an equal split
+    upper = max(max_weight, 1 / len(cov))
+    if mode == 'Minimum Variance':
+        return mean_variance_weights(cov, mu, 0.0, upper)
+    if mode == 'Maximum Sharpe':
+        return max_sharpe_weights(cov, mu, upper, risk_free_rate)
+    if mode == 'Hierarchical Risk Parity':
+        return hrp_weights(cov, upper)
+    raise ValueError(f"Unknown optimization mode: {mode}")
+
+
+def rebalancing_trades(current_value, prices, target_weights, shares=None, lot_size=LOT_SIZE):
+    """Whole-lot trades per ticker that move current values towards the target weights.
+
+    All arguments are Series indexed by ticker; sells never exceed the shares held.
+    """
+    total = current_value.sum()
+    target_value = target_weights * total
+    lots = np.round((target_value - current_value) / (prices * lot_size)).fillna(0)
+    if shares is not None:
+        lots = np.maximum(lots, -np.floor(shares / lot_size))
+    lots = lots.astype(int)
+    return pd.DataFrame({
+        'Bobot Saat Ini': current_value / total,
+        'Bobot Target': target_weights,
+        'Nilai Saat Ini': current_value,
+        'Nilai Target': target_value,
+        'Aksi': np.where(lots > 0, 'Beli', np.where(lots < 0, 'Jual', 'Tahan')),
+        'Lot': lots.abs(),
+        'Nilai Transaksi': lots * lot_size * prices
+    })
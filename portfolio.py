@@ -2,8 +2,8 @@ import pandas as pd
 import streamlit as st
 import time
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+
+PRICE_CACHE_SECONDS = 60
 
 class Portfolio:
     def __init__(self, yfinance_provider, fmp_provider):
@@ -27,6 +27,29 @@ class Portfolio:
             st.error(f"Error processing file: {str(e)}")
             self.df = pd.DataFrame()
 
+    def load_from_ledger(self, ledger, method='FIFO'):
+        """Holdings from the open lots of a transaction ledger instead of an upload"""
+        positions = ledger.cost_basis(method)['open']
+        self.df = pd.DataFrame({
+            'Ticker': positions['Ticker'],
+            'Lot Balance': positions['Shares'],
+            'Avg Price': positions['Avg Price']
+        })
+
+    def _current_prices(self, tickers):
+        price_cache = st.session_state.setdefault('realtime_prices', {})
+        now = time.time()
+        stale = [
+            ticker for ticker in pd.unique(pd.Series(tickers))
+            if now - price_cache.get(ticker, (None, 0))[1] >= PRICE_CACHE_SECONDS
+        ]
+        if stale:
+            quotes = self.yfinance_provider.get_realtime_data_bulk(stale)
+            for ticker, last_price in quotes['Last Price'].dropna().items():
+                price_cache[ticker] = (float(last_price), now)
+        
+        return pd.Series({ticker: price for ticker, (price, _) in price_cache.items()}, dtype=float)
+
     def update_realtime_data(self):
         if self.df.empty:
             return
@@ -34,25 +57,8 @@ class Portfolio:
         df_copy = self.df.copy()
         lot_balance_col = 'Lot Balance'
         
-        current_prices = []
-        for idx, row in df_copy.iterrows():
-            ticker = row['Ticker']
-            
-            cache_key = f"price_{ticker}"
-            if cache_key in st.session_state and (time.time() - st.session_state.get(f"{cache_key}_time", 0)) < 60:
-                last_price = st.session_state[cache_key]
-            else:
-                last_price, _, _, _ = self.yfinance_provider.get_realtime_data(ticker)
-                if last_price is not None:
-                    st.session_state[cache_key] = last_price
-                    st.session_state[f"{cache_key}_time"] = time.time()
-            
-            if last_price is None:
-                last_price = row['Avg Price']
-            
-            current_prices.append(last_price)
-        
-        df_copy['Current Price'] = current_prices
+        cached_prices = self._current_prices(df_copy['Ticker'])
+        df_copy['Current Price'] = df_copy['Ticker'].map(cached_prices).fillna(df_copy['Avg Price'])
         df_copy['Current Value'] = df_copy[lot_balance_col] * df_copy['Current Price']
         df_copy['Profit/Loss'] = df_copy['Current Value'] - (df_copy[lot_balance_col] * df_copy['Avg Price'])
         df_copy['Profit/Loss %'] = (df_copy['Current Value'] / (df_copy[lot_balance_col] * df_copy['Avg Price']) - 1) * 100
@@ -60,6 +66,9 @@ class Portfolio:
         self.df = df_copy
 
     def get_dca_analysis(self):
+        import plotly.express as px
+        import plotly.graph_objects as go
+        
         if self.df.empty:
             return
         
@@ -129,12 +138,15 @@ class Portfolio:
             'Keuntungan/Kerugian %': '{:+.2f}%'
         }), use_container_width=True)
 
-    def capital_tracking(self):
-        if 'transactions' not in st.session_state:
-            st.session_state.transactions = []
-            
+    def capital_tracking(self, ledger):
+        from ledger import RECENT_LIMIT
+        
         st.subheader("💵 Tracking Modal")
         
+        if ledger is None:
+            st.info("Masukkan ID ledger di sidebar untuk mencatat dan menyimpan transaksi Anda")
+            return
+        
         with st.expander("Tambah Transaksi Baru"):
             with st.form("transaction_form"):
                 date = st.date_input("Tanggal Transaksi", pd.to_datetime("today"))
@@ -145,32 +157,38 @@ class Portfolio:
                 submit = st.form_submit_button("Tambahkan Transaksi")
                 
                 if submit:
-                    transaction = {
-                        'Date': date,
-                        'Ticker': ticker,
-                        'Action': action,
-                        'Shares': shares,
-                        'Price': price,
-                        'Amount': shares * price * (-1 if action == "Jual" else 1)
-                    }
-                    st.session_state.transactions.append(transaction)
+                    ledger.add(date, ticker, action, shares, price)
                     st.success("Transaksi ditambahkan!")
         
-        if st.session_state.transactions:
-            df_transactions = pd.DataFrame(st.session_state.transactions)
-            
-            df_transactions['Cumulative'] = df_transactions['Amount'].cumsum()
+        with st.expander("Impor dari File Broker"):
+            broker_file = st.file_uploader("Upload riwayat transaksi (CSV atau Excel)", type=["csv", "xlsx"],
+                                           key="broker_file")
+            if broker_file is not None and st.button("Impor Transaksi"):
+                try:
+                    added = ledger.import_csv(broker_file)
+                    st.success(f"{added} transaksi baru diimpor (transaksi yang sudah ada dilewati)")
+                except Exception as e:
+                    st.error(f"Error importing file: {str(e)}")
+        
+        summary = ledger.summary()
+        if summary['transactions']:
+            df_transactions = ledger.recent()
+            if summary['transactions'] > RECENT_LIMIT:
+                st.caption(f"Menampilkan {RECENT_LIMIT} transaksi terakhir dari {summary['transactions']:,}")
             
             st.dataframe(df_transactions.style.format({
+                'Shares': '{:,.0f}',
                 'Price': 'Rp {:,.0f}',
                 'Amount': 'Rp {:,.0f}',
                 'Cumulative': 'Rp {:,.0f}'
             }), use_container_width=True)
             
+            import plotly.graph_objects as go
+            balances = ledger.balance_history()
             fig = go.Figure()
             fig.add_trace(go.Scatter(
-                x=df_transactions['Date'],
-                y=df_transactions['Cumulative'],
+                x=balances['Date'],
+                y=balances['Cumulative'],
                 mode='lines+markers',
                 name='Saldo Akumulatif'
             ))
@@ -181,11 +199,82 @@ class Portfolio:
             )
             st.plotly_chart(fig, use_container_width=True)
             
-            total_investment = df_transactions[df_transactions['Action'] == 'Beli']['Amount'].sum()
-            total_sales = abs(df_transactions[df_transactions['Action'] == 'Jual']['Amount'].sum())
-            net_cashflow = df_transactions['Amount'].sum()
-            
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Pembelian", f"Rp {total_investment:,.0f}")
-            col2.metric("Total Penjualan", f"Rp {total_sales:,.0f}")
-            col3.metric("Saldo Saat Ini", f"Rp {net_cashflow:,.0f}")
\ No newline at end of file
+            col1.metric("Total Pembelian", f"Rp {summary['purchases']:,.0f}")
+            col2.metric("Total Penjualan", f"Rp {summary['sales']:,.0f}")
+            col3.metric("Saldo Saat Ini", f"Rp {summary['balance']:,.0f}")
+            
+            st.write("### Ringkasan per Saham")
+            st.dataframe(ledger.positions().rename(columns={
+                'Transactions': 'Jumlah Transaksi',
+                'Shares': 'Jumlah Lembar',
+                'Purchases': 'Total Pembelian',
+                'Sales': 'Total Penjualan',
+                'First Date': 'Transaksi Pertama',
+                'Last Date': 'Transaksi Terakhir'
+            }).style.format({
+                'Jumlah Lembar': '{:,.0f}',
+                'Total Pembelian': 'Rp {:,.0f}',
+                'Total Penjualan': 'Rp {:,.0f}'
+            }), use_container_width=True)
+            
+            self.display_cost_basis(ledger)
+
+    def display_cost_basis(self, ledger):
+        from cost_basis import METHODS, performance
+        
+        st.write("### Kinerja Portofolio dari Riwayat Transaksi")
+        method = st.radio("Metode Harga Pokok", METHODS, horizontal=True,
+                          format_func=lambda name: {'FIFO': 'FIFO', 'Average Cost': 'Rata-rata'}[name])
+        
+        matched = ledger.cost_basis(method)
+        result = performance(matched, self._current_prices(matched['open']['Ticker']))
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Laba/Rugi Terealisasi", f"Rp {result['realized_pl']:,.0f}")
+        col2.metric("Laba/Rugi Belum Terealisasi", f"Rp {result['unrealized_pl']:,.0f}",
+                    f"{result['unrealized_pl'] / result['cost_basis'] * 100:+.2f}%" if result['cost_basis'] else None)
+        col3.metric("Time-Weighted Return", f"{result['twr'] * 100:+.2f}%")
+        col4.metric("XIRR (per Tahun)", f"{result['xirr'] * 100:+.2f}%" if np.isfinite(result['xirr']) else "-")
+        
+        if result['unmatched_shares'] > 0:
+            st.warning(f"{result['unmatched_shares']:,.0f} lembar terjual tanpa riwayat pembelian, "
+                       "dicatat tanpa laba/rugi")
+        
+        if not result['open'].empty:
+            st.write("#### Posisi Terbuka")
+            st.dataframe(result['open'].rename(columns={
+                'Shares': 'Jumlah Lembar',
+                'Cost Basis': 'Harga Pokok',
+                'Avg Price': 'Harga Rata-rata',
+                'Current Price': 'Harga Saat Ini',
+                'Market Value': 'Nilai Saat Ini',
+                'Unrealized P/L': 'Laba/Rugi',
+                'Holding Days': 'Lama Dimiliki (Hari)'
+            }).style.format({
+                'Jumlah Lembar': '{:,.0f}',
+                'Harga Pokok': 'Rp {:,.0f}',
+                'Harga Rata-rata': 'Rp {:,.0f}',
+                'Harga Saat Ini': 'Rp {:,.0f}',
+                'Nilai Saat Ini': 'Rp {:,.0f}',
+                'Laba/Rugi': 'Rp {:,.0f}',
+                'Lama Dimiliki (Hari)': '{:,.0f}'
+            }), use_container_width=True)
+        
+        if not result['realized'].empty:
+            from ledger import RECENT_LIMIT
+            st.write("#### Penjualan Terakhir")
+            st.dataframe(result['realized'].tail(RECENT_LIMIT).iloc[::-1].rename(columns={
+                'Date': 'Tanggal',
+                'Shares': 'Jumlah Lembar',
+                'Proceeds': 'Hasil Penjualan',
+                'Cost Basis': 'Harga Pokok',
+                'Holding Days': 'Lama Dimiliki (Hari)',
+                'Realized P/L': 'Laba/Rugi'
+            }).style.format({
+                'Jumlah Lembar': '{:,.0f}',
+                'Hasil Penjualan': 'Rp {:,.0f}',
+                'Harga Pokok': 'Rp {:,.0f}',
+                'Lama Dimiliki (Hari)': '{:,.0f}',
+                'Laba/Rugi': 'Rp {:,.0f}'
+            }), use_container_width=True)
\ No newline at end of file
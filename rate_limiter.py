@@ -0,0 +1,116 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Default (requests per second, burst) per upstream service.
+# Override with e.g. KILO_RATE_YAHOO="2:5".
+DEFAULT_LIMITS = {
+    'yahoo': (2.0, 5),
+    'fmp': (5.0, 10),
+    'news': (1.0, 3),
+    'rss': (4.0, 8),
+}
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message="Too Many Requests (429)", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket with multiplicative slow-down after a 429"""
+
+    def __init__(self, rate, burst):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = self.max_rate / 16
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, BASE_BACKOFF)
+        else:
+            # Full jitter keeps concurrent sessions from retrying in lockstep
+            delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        return delay
+
+    def record_success(self):
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name):
+    with _limiters_lock:
+        if name not in _limiters:
+            rate, burst = DEFAULT_LIMITS.get(name, (1.0, 1))
+            override = os.environ.get(f"KILO_RATE_{name.upper()}")
+            if override:
+                rate, burst = override.split(":")
+            _limiters[name] = TokenBucket(float(rate), int(burst))
+        return _limiters[name]
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(error):
+    return isinstance(error, RateLimitExceeded) or "Too Many Requests" in str(error) or "429" in str(error)
+
+
+def call_with_backoff(limiter, func, *args, max_attempts=4, **kwargs):
+    for attempt in range(max_attempts):
+        limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_attempts - 1:
+                raise
+            limiter.backoff(attempt, getattr(e, 'retry_after', None))
+            continue
+        limiter.record_success()
+        return result
@@ -0,0 +1,56 @@
+import os
+import streamlit as st
+
+# Process-wide providers and analyzers, built once per API key instead of on every
+# rerun. They hold no per-user state (that lives in st.session_state), so they are
+# safe to share between sessions. Portfolio stays per session because it holds
+# the uploaded holdings.
+MAX_KEYED_RESOURCES = 16
+# KILO_NEWS_INGEST=thread runs the news_daemon.py polling loop inside the app process
+NEWS_INGEST_THREAD = os.environ.get("KILO_NEWS_INGEST") == "thread"
+
+
+@st.cache_resource(show_spinner=False)
+def get_yfinance_provider():
+    from yfinance_provider import YFinanceProvider
+    return YFinanceProvider()
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_KEYED_RESOURCES)
+def get_fmp_provider(api_key):
+    from fmp_provider import FMPProvider
+    return FMPProvider(api_key)
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_KEYED_RESOURCES)
+def get_news_provider(api_key=None):
+    from news_provider import NewsProvider
+    return NewsProvider(api_key)
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_KEYED_RESOURCES)
+def get_sentiment_analyzer(news_api_key=None):
+    # The VADER lexicon is loaded here, once per process
+    from sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer(get_news_provider(news_api_key))
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_KEYED_RESOURCES)
+def get_stock_analyzer(fmp_api_key, news_api_key=None):
+    from stock_analyzer import StockAnalyzer
+    sentiment_analyzer = get_sentiment_analyzer(news_api_key)
+    return StockAnalyzer(get_yfinance_provider(), get_fmp_provider(fmp_api_key),
+                         news_provider=sentiment_analyzer.news_provider,
+                         sentiment_analyzer=sentiment_analyzer)
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_KEYED_RESOURCES)
+def get_news_ingestor(news_api_key=None):
+    from news_daemon import NewsIngestor
+    return NewsIngestor(get_news_provider(news_api_key), get_sentiment_analyzer(news_api_key)).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_risk_profiler():
+    from risk_profiler import RiskProfiler
+    return RiskProfiler()
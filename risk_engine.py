@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+DEFAULT_WINDOW = 252
+DEFAULT_CONFIDENCE = 0.95
+# Trackers for the most recently viewed ticker sets; older ones are dropped
+MAX_TRACKERS = 32
+
+
+class CovarianceTracker:
+    """Rolling window of daily log returns kept as running moment sums.
+
+    Adding or dropping a day is an O(p^2) update of the sums, so a rerun with one
+    new bar never recomputes the covariance from the full return matrix. The
+    Ledoit-Wolf (scaled identity target) shrinkage is derived from the same sums.
+    """
+
+    def __init__(self, tickers, window=DEFAULT_WINDOW):
+        self.tickers = list(tickers)
+        self.window = window
+        self.returns = pd.DataFrame(columns=self.tickers, dtype=float)
+        p = len(self.tickers)
+        self._n = 0
+        self._sum = np.zeros(p)
+        self._outer = np.zeros((p, p))
+        self._sq = 0.0
+        self._sq2 = 0.0
+        self._sq_x = np.zeros(p)
+        # Reentrant: ledoit_wolf reads the mean and sample covariance under the same lock
+        self._lock = threading.RLock()
+
+    def _accumulate(self, rows, sign):
+        if len(rows) == 0:
+            return
+        x = rows.to_numpy(dtype=float)
+        sq = np.einsum('ij,ij->i', x, x)
+        self._n += sign * len(x)
+        self._sum += sign * x.sum(axis=0)
+        self._outer += sign * (x.T @ x)
+        self._sq += sign * sq.sum()
+        self._sq2 += sign * (sq ** 2).sum()
+        self._sq_x += sign * (sq @ x)
+
+    def update(self, returns):
+        """Feeds complete return rows; only rows from the last tracked date onward are touched"""
+        returns = returns.reindex(columns=self.tickers).dropna()
+        with self._lock:
+            if not self.returns.empty:
+                # The last tracked bar may have been an open session, so it is replaced
+                last_date = self.returns.index[-1]
+                self._accumulate(self.returns.loc[[last_date]], -1)
+                self.returns = self.returns.iloc[:-1]
+                returns = returns[returns.index >= last_date]
+
+            self._accumulate(returns, 1)
+            self.returns = pd.concat([self.returns, returns]) if not self.returns.empty else returns.copy()
+
+            excess = len(self.returns) - self.window
+            if excess > 0:
+                self._accumulate(self.returns.iloc[:excess], -1)
+                self.returns = self.returns.iloc[excess:]
+        return self
+
+    def __len__(self):
+        return self._n
+
+    def mean(self):
+        with self._lock:
+            return self._sum / self._n
+
+    def sample_covariance(self):
+        with self._lock:
+            mu = self.mean()
+            return self._outer / self._n - np.outer(mu, mu)
+
+    def moments(self):
+        """(shrunk covariance, shrinkage, mean, return window) from one consistent state,
+        for readers that may run while another session is inside update()"""
+        with self._lock:
+            cov, shrinkage = self.ledoit_wolf()
+            return cov, shrinkage, self.mean(), self.returns
+
+    def ledoit_wolf(self):
+        """Returns (shrunk covariance, shrinkage intensity)"""
+        with self._lock:
+            return self._ledoit_wolf()
+
+    def _ledoit_wolf(self):
+        n, p = self._n, len(self.tickers)
+        mu = self.mean()
+        cov = self.sample_covariance()
+        target = np.trace(cov) / p
+
+        delta = np.sum(cov ** 2) - 2 * target * np.trace(cov) + p * target ** 2
+        if delta <= 0:
+            return cov, 0.0
+
+        # sum_t ||x_t - mu||^4 expanded in terms of the running sums
+        mu_sq = mu @ mu
+        centered_fourth = (
+            self._sq2
+            + 4 * mu @ self._outer @ mu
+            + n * mu_sq ** 2
+            - 4 * mu @ self._sq_x
+            + 2 * mu_sq * self._sq
+            - 4 * mu_sq * (mu @ self._sum)
+        )
+        beta = (centered_fourth / n - np.sum(cov ** 2)) / n
+        shrinkage = min(max(beta, 0.0), delta) / delta
+
+        shrunk = (1 - shrinkage) * cov
+        shrunk[np.diag_indices(p)] += shrinkage * target
+        return shrunk, shrinkage
+
+
+_trackers = OrderedDict()
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(tickers, window=DEFAULT_WINDOW):
+    key = (tuple(tickers), window)
+    with _trackers_lock:
+        if key in _trackers:
+            _trackers.move_to_end(key)
+        else:
+            _trackers[key] = CovarianceTracker(tickers, window)
+            while len(_trackers) > MAX_TRACKERS:
+                _trackers.popitem(last=False)
+        return _trackers[key]
+
+
+def log_returns(close):
+    return np.log(close).diff().iloc[1:]
+
+
+def portfolio_risk(tracker, weights, confidence=DEFAULT_CONFIDENCE):
+    """Volatility, VaR/CVaR and risk contributions for weights aligned to tracker.tickers"""
+    weights = np.asarray(weights, dtype=float)
+    cov, shrinkage, mu, returns = tracker.moments()
+
+    sigma = np.sqrt(max(weights @ cov @ weights, 0.0))
+    marginal = cov @ weights / sigma if sigma > 0 else np.zeros_like(weights)
+    contribution = weights * marginal
+
+    z = NormalDist().inv_cdf(confidence)
+    expected = weights @ mu
+    parametric_var = z * sigma - expected
+    parametric_cvar = sigma * np.exp(-z ** 2 / 2) / np.sqrt(2 * np.pi) / (1 - confidence) - expected
+
+    portfolio_returns = returns.to_numpy(dtype=float) @ weights
+    cutoff = np.quantile(portfolio_returns, 1 - confidence)
+    historical_var = -cutoff
+    historical_cvar = -portfolio_returns[portfolio_returns <= cutoff].mean()
+
+    per_ticker = pd.DataFrame({
+        'Bobot': weights,
+        'Volatilitas Tahunan': np.sqrt(np.diag(cov) * TRADING_DAYS),
+        'Kontribusi Marjinal': marginal * np.sqrt(TRADING_DAYS),
+        'Kontribusi Risiko': contribution / sigma if sigma > 0 else np.zeros_like(weights)
+    }, index=tracker.tickers)
+
+    return {
+        'volatility': sigma * np.sqrt(TRADING_DAYS),
+        'parametric_var': parametric_var,
+        'parametric_cvar': parametric_cvar,
+        'historical_var': historical_var,
+        'historical_cvar': historical_cvar,
+        'shrinkage': shrinkage,
+        'observations': len(returns),
+        'per_ticker': per_ticker
+    }
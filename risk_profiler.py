@@ -1,6 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
+import optimizer
+from classification import UNCLASSIFIED, classify_tickers
+from fundamentals_snapshot import get_snapshot
+import risk_engine
+from monte_carlo import MonteCarloSimulator, fan_chart
+from scoring import RISK_THRESHOLDS, fill_defaults, score_risk
 
 class RiskProfiler:
     def get_user_profile(self):
@@ -80,7 +87,7 @@ class RiskProfiler:
         
         return st.session_state.get('risk_profile', None)
 
-    def get_diversification_recommendation(self, portfolio_df, risk_profile):
+    def get_diversification_recommendation(self, portfolio_df, risk_profile, yfinance_provider=None, fmp_provider=None):
         st.subheader("🌐 Rekomendasi Diversifikasi Portofolio")
         
         if not risk_profile:
@@ -98,22 +105,11 @@ class RiskProfiler:
             "Sangat Agresif": {"Saham Blue Chip": 20, "Saham Pendapatan": 5, "Reksa Dana Pendapatan Tetap": 0, "Saham Growth": 50, "Saham Spekulatif": 25}
         }
         
-        blue_chips = ["BBCA", "BBRI", "BBNI", "BMRI", "TLKM", "EXCL", "ASII"]
-        income_stocks = ["UNVR", "ICBP", "MYOR", "INDF", "SMGR"]
-        growth_stocks = ["GOTO", "ARTO", "BRIS", "ACES", "EMTK"]
-        
-        portfolio_df['Kategori'] = "Lainnya"
-        
-        for idx, row in portfolio_df.iterrows():
-            ticker = row['Ticker'].replace('.JK', '')
-            if ticker in blue_chips:
-                portfolio_df.at[idx, 'Kategori'] = "Saham Blue Chip"
-            elif ticker in income_stocks:
-                portfolio_df.at[idx, 'Kategori'] = "Saham Pendapatan"
-            elif ticker in growth_stocks:
-                portfolio_df.at[idx, 'Kategori'] = "Saham Growth"
-            else:
-                portfolio_df.at[idx, 'Kategori'] = "Saham Spekulatif"
+        # Categories come from the snapshot's lookup table; FMP only for stocks it does not cover
+        portfolio_df['Kategori'] = classify_tickers(portfolio_df['Ticker'], get_snapshot(), fmp_provider)
+        unclassified = portfolio_df.loc[portfolio_df['Kategori'] == UNCLASSIFIED, 'Ticker'].unique()
+        if len(unclassified):
+            st.caption(f"Data fundamental tidak tersedia, tidak diklasifikasikan: {', '.join(unclassified)}")
         
         total_value = portfolio_df['Current Value'].sum()
         current_allocation = portfolio_df.groupby('Kategori')['Current Value'].sum() / total_value * 100
@@ -136,6 +132,52 @@ class RiskProfiler:
                      barmode='group', title='Alokasi Portofolio Saat Ini vs Target')
         fig.update_layout(yaxis_title='Persentase (%)')
         st.plotly_chart(fig, use_container_width=True)
+        
+        if yfinance_provider is not None:
+            self.display_optimized_allocation(portfolio_df, risk_profile, yfinance_provider)
+
+    def display_optimized_allocation(self, portfolio_df, risk_profile, yfinance_provider):
+        st.write(f"### Bobot Optimal per Saham ({risk_profile})")
+        
+        holdings = portfolio_df.groupby('Ticker').agg({'Current Value': 'sum', 'Current Price': 'last', 'Lot Balance': 'sum'})
+        holdings = holdings[holdings['Current Value'] > 0]
+        tracker = self._get_tracker(holdings['Current Value'], yfinance_provider)
+        if tracker is None:
+            return None
+        
+        settings = optimizer.PROFILE_SETTINGS[risk_profile]
+        col1, col2 = st.columns(2)
+        mode = col1.selectbox("Metode Optimasi", optimizer.MODES, index=optimizer.MODES.index(settings['mode']))
+        max_weight = col2.slider("Bobot Maksimum per Saham (%)", min_value=5, max_value=100,
+                                 value=int(settings['max_weight'] * 100), step=5) / 100
+        
+        cov, _, mu, _ = tracker.moments()
+        tickers = tracker.tickers
+        target = pd.Series(optimizer.optimize_weights(cov, mu, mode, max_weight), index=tickers)
+        holdings = holdings.reindex(tickers)
+        current = (holdings['Current Value'] / holdings['Current Value'].sum()).to_numpy()
+        
+        col1, col2, col3 = st.columns(3)
+        for col, label, weights in ((col1, "Saat Ini", current), (col2, "Target", target.to_numpy())):
+            volatility = np.sqrt(weights @ cov @ weights * risk_engine.TRADING_DAYS)
+            col.metric(f"Volatilitas {label}", f"{volatility * 100:.1f}%",
+                       f"Sharpe {optimizer.sharpe_ratio(weights, cov, mu):.2f}", delta_color="off")
+        
+        trades = optimizer.rebalancing_trades(holdings['Current Value'], holdings['Current Price'], target,
+                                              shares=holdings['Lot Balance'])
+        col3.metric("Arus Kas Rebalancing", f"Rp {-trades['Nilai Transaksi'].sum():,.0f}")
+        
+        trades = trades.rename_axis('Ticker').reset_index()
+        st.dataframe(trades.style.format({
+            'Bobot Saat Ini': '{:.1%}', 'Bobot Target': '{:.1%}', 'Nilai Saat Ini': 'Rp {:,.0f}',
+            'Nilai Target': 'Rp {:,.0f}', 'Nilai Transaksi': 'Rp {:,.0f}'
+        }), use_container_width=True)
+        
+        fig = px.bar(trades, x='Ticker', y=['Bobot Saat Ini', 'Bobot Target'], barmode='group',
+                     title=f'Bobot Saat Ini vs {mode}')
+        fig.update_layout(yaxis_title='Bobot', yaxis_tickformat='.0%')
+        st.plotly_chart(fig, use_container_width=True)
+        return trades
 
     def calculate_portfolio_risk_score(self, portfolio_df, fmp_provider):
         st.subheader("📊 Skor Risiko Portofolio")
@@ -152,79 +194,122 @@ class RiskProfiler:
             st.warning("Kolom 'Current Value' tidak ditemukan, menggunakan 'Avg Price' sebagai alternatif")
             portfolio_df['Current Value'] = portfolio_df['Lot Balance'] * portfolio_df['Avg Price']
         
-        risk_factors = []
+        # One normalized key per holding, so BBCA and BBCA.JK are the same stock
+        ticker_keys = portfolio_df['Ticker'].str.replace('.JK', '', regex=False).str.strip().str.upper()
+        bulk_data = fmp_provider.get_fmp_data_bulk(ticker_keys.unique().tolist(), ('ratios', 'quote'))
         
-        for i, (idx, row) in enumerate(portfolio_df.iterrows()):
-            ticker = row['Ticker'].replace('.JK', '')
-            
-            try:
-                fmp_data = fmp_provider.get_fmp_data(ticker)
-                if not fmp_data:
-                    continue
-                    
-                ratios = fmp_data.get('ratios', {})
-                profile = fmp_data.get('profile', {})
-                quote = fmp_data.get('quote', {})
-                
-                beta = profile.get('beta', 1.0)
-                vol = quote.get('change', 0)
-                per = ratios.get('priceEarningsRatio', 15)
-                der = ratios.get('debtEquityRatio', 0.5)
-                size = profile.get('mktCap', 1000000000000)
-                
-                risk_score = 0
-                
-                if beta > 1.5: risk_score += 3
-                elif beta > 1.2: risk_score += 2
-                elif beta > 1.0: risk_score += 1
-                    
-                if abs(vol) > 5: risk_score += 3
-                elif abs(vol) > 3: risk_score += 2
-                elif abs(vol) > 1: risk_score += 1
-                    
-                if per > 25: risk_score += 2
-                elif per > 20: risk_score += 1
-                    
-                if der > 2.0: risk_score += 3
-                elif der > 1.5: risk_score += 2
-                elif der > 1.0: risk_score += 1
-                    
-                if size < 500000000000: risk_score += 3
-                elif size < 1000000000000: risk_score += 2
-                elif size < 5000000000000: risk_score += 1
-                    
-                risk_factors.append({
-                    'Ticker': ticker, 'Beta': beta, 'Volatilitas': vol, 'PER': per,
-                    'DER': der, 'Market Cap': size, 'Skor Risiko': min(10, risk_score)
-                })
-                
-            except Exception as e:
-                st.error(f"Error menganalisis {ticker}: {str(e)}")
+        factors = pd.DataFrame.from_dict({
+            ticker: {
+                'beta': fmp_data['profile'].get('beta'),
+                'change': fmp_data['quote'].get('change'),
+                'priceEarningsRatio': fmp_data['ratios'].get('priceEarningsRatio'),
+                'debtEquityRatio': fmp_data['ratios'].get('debtEquityRatio'),
+                'mktCap': fmp_data['profile'].get('mktCap')
+            }
+            for ticker, fmp_data in bulk_data.items() if fmp_data
+        }, orient='index', columns=list(RISK_THRESHOLDS))
         
-        if not risk_factors:
+        if factors.empty:
             st.warning("Tidak dapat menghitung skor risiko")
             return 0
         
-        total_value = portfolio_df['Current Value'].sum()
-        portfolio_risk_score = 0
+        factors = fill_defaults(factors.apply(pd.to_numeric, errors='coerce'), RISK_THRESHOLDS)
+        factors['Skor Risiko'] = score_risk(factors)
         
-        for risk_factor in risk_factors:
-            ticker = risk_factor['Ticker']
-            mask = portfolio_df['Ticker'].str.contains(ticker, regex=False)
-            stock_value = portfolio_df.loc[mask, 'Current Value'].sum()
-            
-            weight = stock_value / total_value if total_value > 0 else 0
-            portfolio_risk_score += risk_factor['Skor Risiko'] * weight
+        total_value = portfolio_df['Current Value'].sum()
+        stock_values = portfolio_df['Current Value'].groupby(ticker_keys).sum()
+        weights = stock_values.reindex(factors.index).fillna(0) / total_value if total_value > 0 else 0
+        portfolio_risk_score = (factors['Skor Risiko'] * weights).sum()
         
         st.metric("Skor Risiko Portofolio", f"{portfolio_risk_score:.1f}/10.0",
                  "Rendah" if portfolio_risk_score < 3 else
                  "Sedang" if portfolio_risk_score < 6 else
                  "Tinggi" if portfolio_risk_score < 8 else "Sangat Tinggi")
         
-        df_risk = pd.DataFrame(risk_factors)
+        df_risk = factors.rename(columns={
+            'beta': 'Beta', 'change': 'Volatilitas', 'priceEarningsRatio': 'PER',
+            'debtEquityRatio': 'DER', 'mktCap': 'Market Cap'
+        }).rename_axis('Ticker').reset_index()
         st.dataframe(df_risk.style.format({
             'Beta': '{:.2f}', 'Volatilitas': '{:.2f}%', 'PER': '{:.2f}',
             'DER': '{:.2f}', 'Market Cap': 'Rp {:,.0f}'
         }).background_gradient(subset=['Skor Risiko'], cmap='YlOrRd'), use_container_width=True)
         
-        return portfolio_risk_score
\ No newline at end of file
+        return portfolio_risk_score
+
+    def display_risk_engine(self, portfolio_df, yfinance_provider):
+        st.subheader("📉 Volatilitas, VaR & Kontribusi Risiko")
+        
+        if portfolio_df.empty or 'Current Value' not in portfolio_df.columns:
+            st.warning("Silakan upload portofolio Anda terlebih dahulu")
+            return None
+        
+        holdings = portfolio_df.groupby('Ticker')['Current Value'].sum()
+        holdings = holdings[holdings > 0]
+        
+        tracker = self._get_tracker(holdings, yfinance_provider)
+        if tracker is None:
+            return None
+        
+        tickers = tracker.tickers
+        weights = holdings.reindex(tickers).to_numpy()
+        weights = weights / weights.sum()
+        result = risk_engine.portfolio_risk(tracker, weights)
+        
+        total_value = holdings.reindex(tickers).sum()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Volatilitas Tahunan", f"{result['volatility'] * 100:.1f}%")
+        col2.metric("VaR 95% (1 Hari)", f"Rp {result['historical_var'] * total_value:,.0f}",
+                    f"Parametrik: Rp {result['parametric_var'] * total_value:,.0f}", delta_color="off")
+        col3.metric("CVaR 95% (1 Hari)", f"Rp {result['historical_cvar'] * total_value:,.0f}",
+                    f"Parametrik: Rp {result['parametric_cvar'] * total_value:,.0f}", delta_color="off")
+        st.caption(f"{result['observations']} hari data, shrinkage Ledoit-Wolf {result['shrinkage']:.2f}")
+        
+        per_ticker = result['per_ticker'].rename_axis('Ticker').reset_index()
+        st.dataframe(per_ticker.style.format({
+            'Bobot': '{:.1%}', 'Volatilitas Tahunan': '{:.1%}',
+            'Kontribusi Marjinal': '{:.1%}', 'Kontribusi Risiko': '{:.1%}'
+        }), use_container_width=True)
+        
+        fig = px.bar(per_ticker, x='Ticker', y=['Bobot', 'Kontribusi Risiko'], barmode='group',
+                     title='Bobot vs Kontribusi Risiko per Saham')
+        fig.update_layout(yaxis_title='Persentase', yaxis_tickformat='.0%')
+        st.plotly_chart(fig, use_container_width=True)
+        
+        if st.checkbox("Jalankan simulasi Monte Carlo portofolio (1 tahun)"):
+            self.display_portfolio_simulation(tracker, weights, total_value)
+        
+        return result
+
+    def _get_tracker(self, holdings, yfinance_provider):
+        # Return history comes from the history store; the tracker only absorbs new days
+        with st.spinner("Mengambil data historis..."):
+            close = yfinance_provider.get_close_matrix(holdings.index.tolist())
+        
+        returns = risk_engine.log_returns(close.dropna(axis=1, how='all')).dropna()
+        if returns.shape[0] < 30 or returns.shape[1] == 0:
+            st.warning("Data historis tidak cukup untuk menghitung risiko")
+            return None
+        
+        return risk_engine.get_tracker(sorted(returns.columns)).update(returns)
+
+    def display_portfolio_simulation(self, tracker, weights, total_value, horizon=252, n_paths=20000):
+        # Correlated GBM paths drawn from the shrunk covariance of the risk engine
+        cov, _, mu, returns = tracker.moments()
+        simulator = MonteCarloSimulator(returns.to_numpy(), mean=mu, cov=cov, seed=42)
+        
+        with st.spinner("Menjalankan simulasi..."):
+            result = simulator.simulate(weights, total_value, horizon=horizon, n_paths=n_paths)
+        
+        st.plotly_chart(fan_chart(result, 'Simulasi Nilai Portofolio 1 Tahun'), use_container_width=True)
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Nilai Median", f"Rp {result['percentiles']['P50'].iloc[-1]:,.0f}")
+        col2.metric("Persentil 5%", f"Rp {result['percentiles']['P5'].iloc[-1]:,.0f}")
+        col3.metric("Probabilitas Rugi", f"{result['prob_loss_terminal'] * 100:.1f}%")
+        
+        fig = px.line(x=result['prob_loss'].index, y=result['prob_loss'].values * 100,
+                      labels={'x': 'Hari Bursa ke-', 'y': 'Probabilitas Rugi (%)'},
+                      title='Probabilitas Rugi terhadap Horizon')
+        st.plotly_chart(fig, use_container_width=True)
+        return result
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Threshold tables: one rule per column, binned with np.digitize.
+#   edges/points: len(points) == len(edges) + 1, points[i] is awarded for bin i
+#   right=False:  bins are [edge_i, edge_i+1), i.e. the "x < edge" style checks
+#   right=True:   bins are (edge_i, edge_i+1], i.e. the "x > edge" style checks
+#   scale:        multiplier applied first (FMP ratios are fractions, thresholds are %)
+#   absolute:     bin the magnitude, ignoring sign
+#   floor:        optional; values <= floor get floor_points instead
+#   default:      value used when the column is missing or NaN
+VALUATION_THRESHOLDS = {
+    'priceEarningsRatio': {'edges': [15, 20, 25], 'points': [3, 2, 1, 0], 'right': False,
+                           'floor': 0, 'floor_points': 2},
+    'priceToBookRatio': {'edges': [1, 1.5, 2], 'points': [3, 2, 1, 0], 'right': False,
+                         'floor': 0, 'floor_points': 2},
+    'returnOnEquity': {'scale': 100, 'edges': [10, 15, 20], 'points': [0, 1, 2, 3], 'right': True},
+    'netProfitMargin': {'scale': 100, 'edges': [10, 15, 20], 'points': [0, 1, 2, 3], 'right': True},
+    'dividendYield': {'scale': 100, 'edges': [1, 3, 5], 'points': [0, 1, 2, 3], 'right': True},
+}
+
+RISK_THRESHOLDS = {
+    'beta': {'edges': [1.0, 1.2, 1.5], 'points': [0, 1, 2, 3], 'right': True, 'default': 1.0},
+    'change': {'edges': [1, 3, 5], 'points': [0, 1, 2, 3], 'right': True, 'absolute': True, 'default': 0},
+    'priceEarningsRatio': {'edges': [20, 25], 'points': [0, 1, 2], 'right': True, 'default': 15},
+    'debtEquityRatio': {'edges': [1.0, 1.5, 2.0], 'points': [0, 1, 2, 3], 'right': True, 'default': 0.5},
+    'mktCap': {'edges': [5e11, 1e12, 5e12], 'points': [3, 2, 1, 0], 'right': False, 'default': 1e12},
+}
+MAX_RISK_SCORE = 10
+
+
+def bin_points(values, rule):
+    values = np.asarray(values, dtype=float) * rule.get('scale', 1)
+    if rule.get('absolute'):
+        values = np.abs(values)
+    points = np.asarray(rule['points'])[np.digitize(values, rule['edges'], right=rule.get('right', False))]
+    if 'floor' in rule:
+        points = np.where(values <= rule['floor'], rule['floor_points'], points)
+    return points
+
+
+def score_frame(df, thresholds):
+    """Sum of rule points per row; df has one column per rule key"""
+    total = np.zeros(len(df), dtype=int)
+    for column, rule in thresholds.items():
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce').fillna(rule.get('default', 0))
+        else:
+            values = np.full(len(df), rule.get('default', 0), dtype=float)
+        total += bin_points(values, rule)
+    return pd.Series(total, index=df.index)
+
+
+def score_valuation(df, thresholds=VALUATION_THRESHOLDS):
+    return score_frame(df, thresholds)
+
+
+def fill_defaults(df, thresholds):
+    return df.fillna({column: rule.get('default', 0) for column, rule in thresholds.items() if column in df.columns})
+
+
+def score_risk(df, thresholds=RISK_THRESHOLDS):
+    return np.minimum(MAX_RISK_SCORE, score_frame(df, thresholds))
@@ -1,15 +1,82 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
 import streamlit as st
 import numpy as np
-from textblob import TextBlob
+from concurrent.futures import ProcessPoolExecutor
+from cache import TTLCache
+from sentiment_index import WINDOW_HOURS, sentiment_index
 
 try:
     from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 except ImportError:
     SentimentIntensityAnalyzer = None
 
+# Scores are a pure function of the text, so they are cached by content hash
+SENTIMENT_CACHE_SIZE = 8192
+SENTIMENT_CACHE_TTL = 7 * 24 * 60 * 60
+# Scoring takes well under a millisecond per headline, so only large backfills are
+# worth shipping to worker processes (each one pays for the nltk import once)
+PROCESS_POOL_THRESHOLD = 1000
+POOL_WORKERS = min(4, os.cpu_count() or 1)
+POOL_CHUNK_SIZE = 250
+
+
+def score_text(text, analyzer):
+    try:
+        vader_scores = {'compound': 0, 'pos': 0, 'neg': 0, 'neu': 0}
+        if analyzer:
+            vader_scores = analyzer.polarity_scores(text)
+        
+        # TextBlob drags in nltk, so it is only imported once text is actually scored
+        from textblob import TextBlob
+        blob = TextBlob(text)
+        polarity = blob.sentiment.polarity
+        subjectivity = blob.sentiment.subjectivity
+        
+        sentiment = {
+            'vader_compound': vader_scores['compound'],
+            'vader_positive': vader_scores['pos'],
+            'vader_negative': vader_scores['neg'],
+            'vader_neutral': vader_scores['neu'],
+            'textblob_polarity': polarity,
+            'textblob_subjectivity': subjectivity,
+            'combined_score': (vader_scores['compound'] + polarity) / 2
+        }
+        return sentiment
+    except:
+        return {
+            'vader_compound': 0, 'vader_positive': 0, 'vader_negative': 0, 'vader_neutral': 0,
+            'textblob_polarity': 0, 'textblob_subjectivity': 0, 'combined_score': 0
+        }
+
+
+_worker_analyzer = None
+
+
+def _init_worker():
+    # Each pool process loads the VADER lexicon once
+    global _worker_analyzer
+    if SentimentIntensityAnalyzer is not None:
+        _worker_analyzer = SentimentIntensityAnalyzer()
+
+
+def _score_chunk(texts):
+    return [score_text(text, _worker_analyzer) for text in texts]
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
 class SentimentAnalyzer:
-    def __init__(self, news_provider):
+    def __init__(self, news_provider, cache=None):
         self.news_provider = news_provider
+        self.cache = cache if cache is not None else TTLCache(max_entries=SENTIMENT_CACHE_SIZE)
+        self._pool = None
+        self._pool_lock = threading.Lock()
         if SentimentIntensityAnalyzer is None:
             st.warning("vaderSentiment module not found. Sentiment analysis will be limited.")
             self.analyzer = None
@@ -17,30 +84,55 @@ class SentimentAnalyzer:
             self.analyzer = SentimentIntensityAnalyzer()
 
     def analyze_text(self, text):
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts):
+        """Scores for each text, in order; cached texts are not re-scored"""
+        keys = [text_key(text) for text in texts]
+        results = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                missing[key] = text
+        
+        if missing:
+            scores = self._score(list(missing.values()))
+            for key, sentiment in zip(missing, scores):
+                self.cache.set(key, sentiment, SENTIMENT_CACHE_TTL)
+                results[key] = sentiment
+        return [results[key] for key in keys]
+
+    def _score(self, texts):
+        if len(texts) < PROCESS_POOL_THRESHOLD or POOL_WORKERS < 2:
+            return [score_text(text, self.analyzer) for text in texts]
+        
+        chunks = [texts[i:i + POOL_CHUNK_SIZE] for i in range(0, len(texts), POOL_CHUNK_SIZE)]
         try:
-            vader_scores = {'compound': 0, 'pos': 0, 'neg': 0, 'neu': 0}
-            if self.analyzer:
-                vader_scores = self.analyzer.polarity_scores(text)
-            
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
-            
-            sentiment = {
-                'vader_compound': vader_scores['compound'],
-                'vader_positive': vader_scores['pos'],
-                'vader_negative': vader_scores['neg'],
-                'vader_neutral': vader_scores['neu'],
-                'textblob_polarity': polarity,
-                'textblob_subjectivity': subjectivity,
-                'combined_score': (vader_scores['compound'] + polarity) / 2
-            }
-            return sentiment
-        except:
-            return {
-                'vader_compound': 0, 'vader_positive': 0, 'vader_negative': 0, 'vader_neutral': 0,
-                'textblob_polarity': 0, 'textblob_subjectivity': 0, 'combined_score': 0
-            }
+            return [sentiment for chunk in self._get_pool().map(_score_chunk, chunks) for sentiment in chunk]
+        except Exception:
+            # A broken pool must not take the news page down; score in-process instead
+            with self._pool_lock:
+                self._pool = None
+            return [score_text(text, self.analyzer) for text in texts]
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, initializer=_init_worker,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _indexed_news(self, ticker):
+        """Articles and summary precomputed by news_daemon.py, or (None, None) if not indexed or stale"""
+        summary = sentiment_index.get_summary(ticker)
+        if summary is None or not summary['articles']:
+            return None, None
+        return sentiment_index.get_articles(ticker), summary
 
     def display_news_feed(self):
         st.subheader("📰 Market News & Sentiment Analysis")
@@ -50,36 +142,47 @@ class SentimentAnalyzer:
         analysis_level = st.radio("Tingkat Analisis", ["Market", "Sektor", "Saham Tertentu"], horizontal=True)
         
         articles = []
+        summary = None
         
         if analysis_level == "Market":
             query = "stocks OR market OR economy"
             if news_source == "NewsAPI":
                 articles = self.news_provider.get_news_from_newsapi(query)
             else:
-                articles = self.news_provider.get_news_from_yahoo('^GSPC')
+                articles, summary = self._indexed_news('^GSPC')
+                if articles is None:
+                    articles = self.news_provider.get_news_from_yahoo('^GSPC')
         
         elif analysis_level == "Saham Tertentu":
             ticker = st.text_input("Masukkan Kode Saham (contoh: AAPL)", "AAPL")
             if news_source == "NewsAPI":
                 articles = self.news_provider.get_news_from_newsapi(ticker)
             else:
-                articles = self.news_provider.get_news_from_yahoo(ticker)
+                articles, summary = self._indexed_news(ticker)
+                if articles is None:
+                    articles = self.news_provider.get_news_from_yahoo(ticker)
 
         if articles:
             st.subheader(f"Berita Terbaru ({len(articles)} ditemukan)")
             
-            sentiment_scores = []
-            for article in articles:
-                text = f"{article['title']}. {article['description']}"
-                sentiment = self.analyze_text(text)
+            # Articles read from the sentiment index are already scored
+            unscored = [article for article in articles if 'sentiment' not in article]
+            sentiments = self.analyze_many([f"{article['title']}. {article['description']}" for article in unscored])
+            for article, sentiment in zip(unscored, sentiments):
                 article['sentiment'] = sentiment
-                sentiment_scores.append(sentiment['combined_score'])
+            sentiment_scores = [article['sentiment']['combined_score'] for article in articles]
             
-            avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0
+            avg_sentiment = summary['score'] if summary else np.mean(sentiment_scores) if sentiment_scores else 0
             
             st.metric("Rata-rata Sentimen Pasar", f"{avg_sentiment:.2f}", 
                      "Positif" if avg_sentiment > 0.1 else "Negatif" if avg_sentiment < -0.1 else "Netral",
                      delta_color="off")
+            if summary:
+                st.caption(
+                    f"Dari indeks sentimen: {summary['articles']} artikel dalam {WINDOW_HOURS} jam terakhir, "
+                    f"24 jam terakhir {summary['recent_score']:.2f} ({summary['recent_articles']} artikel). "
+                    f"Diperbarui {time.strftime('%H:%M', time.localtime(summary['updated_at']))}"
+                )
 
             for article in articles:
                 sentiment = article['sentiment']
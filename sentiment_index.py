@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from storage import data_path
+
+BUCKET_SECONDS = 60 * 60
+# Rolling window kept in the per-ticker totals; older buckets and articles are pruned
+WINDOW_HOURS = 72
+RECENT_HOURS = 24
+# Summaries older than this are treated as missing and the app fetches live instead
+STALE_SECONDS = 30 * 60
+# Feeds keep serving articles older than the window; their URLs are remembered this
+# long so they are not scored again on every poll
+SEEN_HOURS = 30 * 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    ticker TEXT NOT NULL, url TEXT NOT NULL, title TEXT, description TEXT, source TEXT,
+    published_at TEXT, ts REAL NOT NULL, sentiment TEXT NOT NULL, score REAL NOT NULL,
+    PRIMARY KEY (ticker, url)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_ticker_ts ON articles (ticker, ts);
+CREATE TABLE IF NOT EXISTS buckets (
+    ticker TEXT NOT NULL, bucket INTEGER NOT NULL, articles INTEGER NOT NULL, score_sum REAL NOT NULL,
+    PRIMARY KEY (ticker, bucket)
+);
+CREATE TABLE IF NOT EXISTS totals (
+    ticker TEXT PRIMARY KEY, articles INTEGER NOT NULL, score_sum REAL NOT NULL, updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    ticker TEXT NOT NULL, url TEXT NOT NULL, seen_at REAL NOT NULL, PRIMARY KEY (ticker, url)
+);
+"""
+
+
+def article_timestamp(published_at, default):
+    """Publication time as epoch seconds; RSS (RFC 822) and NewsAPI (ISO 8601) formats"""
+    if published_at:
+        for parse in (parsedate_to_datetime, lambda value: datetime.fromisoformat(value.replace('Z', '+00:00'))):
+            try:
+                parsed = parse(published_at)
+                if parsed.tzinfo is None:
+                    parsed = parsed.replace(tzinfo=timezone.utc)
+                return min(parsed.timestamp(), default)
+            except (TypeError, ValueError):
+                continue
+    return default
+
+
+class SentimentIndex:
+    """Hourly sentiment buckets per ticker plus a rolling total kept up to date on
+    every insert and prune, so reading a ticker's sentiment is one primary-key lookup."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            # WAL lets the app read while the ingestion daemon writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def new_articles(self, ticker, articles):
+        """Articles whose URL is neither indexed nor already seen outside the window for this ticker"""
+        urls = [article['url'] for article in articles]
+        if not urls:
+            return []
+        with self._lock:
+            placeholders = ",".join("?" * len(urls))
+            known = {row[0] for row in self._connect().execute(
+                f"SELECT url FROM articles WHERE ticker = ? AND url IN ({placeholders}) "
+                f"UNION SELECT url FROM seen WHERE ticker = ? AND url IN ({placeholders})",
+                (ticker, *urls, ticker, *urls))}
+        seen = set()
+        fresh = []
+        for article in articles:
+            if article['url'] not in known and article['url'] not in seen:
+                seen.add(article['url'])
+                fresh.append(article)
+        return fresh
+
+    def add(self, ticker, articles, sentiments, now=None):
+        """Indexes scored articles; returns how many were new"""
+        now = time.time() if now is None else now
+        cutoff = now - WINDOW_HOURS * 3600
+        added = 0
+        with self._lock:
+            db = self._connect()
+            with db:
+                for article, sentiment in zip(articles, sentiments):
+                    ts = article_timestamp(article.get('published_at'), now)
+                    if ts < cutoff:
+                        db.execute("INSERT OR IGNORE INTO seen VALUES (?, ?, ?)", (ticker, article['url'], now))
+                        continue
+                    score = sentiment['combined_score']
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (ticker, article['url'], article.get('title'), article.get('description'),
+                         article.get('source'), article.get('published_at'), ts, json.dumps(sentiment), score)
+                    )
+                    if cursor.rowcount == 0:
+                        continue
+                    added += 1
+                    db.execute(
+                        "INSERT INTO buckets VALUES (?, ?, 1, ?) ON CONFLICT (ticker, bucket) DO UPDATE SET "
+                        "articles = articles + 1, score_sum = score_sum + excluded.score_sum",
+                        (ticker, int(ts // BUCKET_SECONDS) * BUCKET_SECONDS, score)
+                    )
+                    db.execute(
+                        "INSERT INTO totals VALUES (?, 1, ?, ?) ON CONFLICT (ticker) DO UPDATE SET "
+                        "articles = articles + 1, score_sum = score_sum + excluded.score_sum",
+                        (ticker, score, now)
+                    )
+                # Polled tickers count as fresh even when nothing new was published
+                db.execute(
+                    "INSERT INTO totals VALUES (?, 0, 0, ?) ON CONFLICT (ticker) DO UPDATE SET updated_at = ?",
+                    (ticker, now, now)
+                )
+        return added
+
+    def prune(self, now=None):
+        """Drops buckets and articles that left the rolling window, adjusting the totals"""
+        now = time.time() if now is None else now
+        cutoff = now - WINDOW_HOURS * 3600
+        with self._lock:
+            db = self._connect()
+            with db:
+                expired = db.execute(
+                    "SELECT ticker, SUM(articles), SUM(score_sum) FROM buckets WHERE bucket + ? <= ? GROUP BY ticker",
+                    (BUCKET_SECONDS, cutoff)
+                ).fetchall()
+                db.executemany(
+                    "UPDATE totals SET articles = articles - ?, score_sum = score_sum - ? WHERE ticker = ?",
+                    [(count, score_sum, ticker) for ticker, count, score_sum in expired]
+                )
+                db.execute("DELETE FROM buckets WHERE bucket + ? <= ?", (BUCKET_SECONDS, cutoff))
+                db.execute("DELETE FROM articles WHERE ts < ?", (int(cutoff // BUCKET_SECONDS) * BUCKET_SECONDS,))
+                db.execute("DELETE FROM seen WHERE seen_at < ?", (now - SEEN_HOURS * 3600,))
+
+    def get_summary(self, ticker, now=None, max_age=STALE_SECONDS):
+        """Rolling and last-24h average score for a ticker, or None if it is not indexed or stale"""
+        now = time.time() if now is None else now
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT articles, score_sum, updated_at FROM totals WHERE ticker = ?",
+                             (ticker,)).fetchone()
+            if row is None or now - row[2] > max_age:
+                return None
+            recent = db.execute(
+                "SELECT COALESCE(SUM(articles), 0), COALESCE(SUM(score_sum), 0) FROM buckets "
+                "WHERE ticker = ? AND bucket >= ?",
+                (ticker, int((now - RECENT_HOURS * 3600) // BUCKET_SECONDS) * BUCKET_SECONDS)
+            ).fetchone()
+        articles, score_sum, updated_at = row
+        return {
+            'score': score_sum / articles if articles else 0,
+            'articles': articles,
+            'recent_score': recent[1] / recent[0] if recent[0] else 0,
+            'recent_articles': recent[0],
+            'updated_at': updated_at
+        }
+
+    def get_articles(self, ticker, limit=10):
+        """Most recent indexed articles, shaped like NewsProvider articles with a 'sentiment' key"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT title, description, url, source, published_at, sentiment FROM articles "
+                "WHERE ticker = ? ORDER BY ts DESC LIMIT ?", (ticker, limit)
+            ).fetchall()
+        return [{
+            'title': title,
+            'description': description or '',
+            'url': url,
+            'source': source,
+            'published_at': published_at or '',
+            'content': description or '',
+            'sentiment': json.loads(sentiment)
+        } for title, description, url, source, published_at, sentiment in rows]
+
+    def get_buckets(self, ticker):
+        """Hourly (bucket start, articles, average score) rows inside the rolling window"""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT bucket, articles, score_sum / articles FROM buckets WHERE ticker = ? ORDER BY bucket",
+                (ticker,)
+            ).fetchall()
+
+
+# Shared between the app and news_daemon.py; override the location with KILO_SENTIMENT_DB
+sentiment_index = SentimentIndex(os.environ.get("KILO_SENTIMENT_DB") or data_path("sentiment.sqlite3"))
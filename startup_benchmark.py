@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules each menu page imports on first render, on top of what `import app` loads.
+# Keep in sync with the lazy imports in app.py, resources.py and the page methods.
+COMMON_MODULES = ['fmp_provider', 'portfolio', 'yfinance_provider', 'ledger']
+ANALYZER_MODULES = COMMON_MODULES + ['yfinance', 'stock_analyzer', 'news_provider', 'sentiment_analyzer']
+MENU_MODULES = {
+    "Dashboard Portfolio": COMMON_MODULES + ['yfinance', 'plotly.express', 'plotly.graph_objects'],
+    "Analisis DCA": COMMON_MODULES + ['yfinance', 'plotly.express', 'plotly.graph_objects'],
+    "Prediksi Harga Saham": ANALYZER_MODULES,
+    "Valuasi Saham": ANALYZER_MODULES,
+    "Tracking Modal": COMMON_MODULES + ['plotly.graph_objects', 'cost_basis'],
+    "Rekomendasi Pembelian": ANALYZER_MODULES,
+    "Market News & Sentiment": COMMON_MODULES + ['news_provider', 'sentiment_analyzer', 'textblob'],
+    "Smart Assistant & Rekomendasi AI": ANALYZER_MODULES + ['risk_profiler'],
+    "Komparasi Saham": ANALYZER_MODULES,
+}
+
+PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+import app
+startup = time.perf_counter() - start
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+menu = time.perf_counter() - start
+print(json.dumps({'startup': startup, 'menu': menu}))
+"""
+
+
+def measure(modules, repeat):
+    """Median cold-start import times (seconds), each run in a fresh interpreter"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE, *modules], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return (statistics.median(run['startup'] for run in runs),
+            statistics.median(run['menu'] for run in runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import cost per menu page")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per menu (median is reported)")
+    parser.add_argument("--menu", action="append", choices=list(MENU_MODULES), help="Only benchmark these menus")
+    args = parser.parse_args()
+
+    print(f"{'Menu':<36}{'app (ms)':>10}{'menu (ms)':>11}{'total (ms)':>12}")
+    for menu in args.menu or MENU_MODULES:
+        startup, page = measure(MENU_MODULES[menu], args.repeat)
+        print(f"{menu:<36}{startup * 1000:>10.0f}{page * 1000:>11.0f}{(startup + page) * 1000:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,28 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-import random
-from sentiment_analyzer import SentimentAnalyzer
-from news_provider import NewsProvider
+import indicators
+from allocation import LOT_SIZE, MAX_POSITION_WEIGHT, allocate_lots
+import forecasting
+from fundamentals_snapshot import RATIO_FIELDS, get_snapshot
+from monte_carlo import MonteCarloSimulator, fan_chart
+from scoring import VALUATION_THRESHOLDS, score_valuation
+from sentiment_index import sentiment_index
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SCREENER_CHUNK_SIZE = 25
+SCREENER_WORKERS = 4
+MONTE_CARLO_PATHS = 10000
+MONTE_CARLO_SEED = 42
 
 class StockAnalyzer:
-    def __init__(self, yfinance_provider, fmp_provider):
+    def __init__(self, yfinance_provider, fmp_provider, valuation_thresholds=VALUATION_THRESHOLDS,
+                 news_provider=None, sentiment_analyzer=None):
         self.yfinance_provider = yfinance_provider
         self.fmp_provider = fmp_provider
+        self.valuation_thresholds = valuation_thresholds
+        self.news_provider = news_provider
+        self.sentiment_analyzer = sentiment_analyzer
 
     def get_prediction(self, ticker):
         try:
@@ -58,7 +72,12 @@ class StockAnalyzer:
             ma20 = hist['MA20'].iloc[-1]
             ma50 = hist['MA50'].iloc[-1]
             
-            if ma20 > ma50 and last_price > ma20:
+            forecast = self.display_forecast(ticker, hist['Close'])
+            if forecast is not None:
+                prediction = forecast['Prediksi'].iloc[-1]
+                change = prediction / last_price - 1
+                trend = "Naik" if change > 0.01 else "Turun" if change < -0.01 else "Netral"
+            elif ma20 > ma50 and last_price > ma20:
                 trend = "Naik"
                 prediction = last_price * 1.05
             elif ma20 < ma50 and last_price < ma20:
@@ -74,6 +93,11 @@ class StockAnalyzer:
                        f"{(prediction/last_price-1)*100:+.2f}%")
             col3.metric("Trend", trend)
             
+            self.display_price_simulation(ticker, hist['Close'])
+            
+            if st.checkbox("Tampilkan indikator intraday", key=f"intraday_{ticker}"):
+                self.display_intraday(ticker)
+            
             rsi = self._calculate_rsi(hist['Close'])
             macd, signal = self._calculate_macd(hist['Close'])
             
@@ -93,6 +117,98 @@ class StockAnalyzer:
         except Exception as e:
             st.error(f"Error in prediction: {str(e)}")
 
+    def display_forecast(self, ticker, close):
+        model_name = st.selectbox("Model Prediksi", list(forecasting.FORECASTERS), key=f"forecast_model_{ticker}")
+        forecast, status = forecasting.get_forecast(model_name, ticker, close)
+        
+        if status.startswith('error'):
+            st.warning(f"Model {model_name} gagal dilatih ({status[7:]}), menggunakan prediksi berbasis MA")
+            return None
+        if forecast is None:
+            st.info(f"Model {model_name} sedang dilatih di latar belakang, sementara menggunakan prediksi berbasis MA")
+            return None
+        if status == 'training':
+            st.info(f"Menampilkan prediksi {model_name} sebelumnya, model untuk data terbaru sedang dilatih")
+        
+        recent = close.iloc[-120:]
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=recent.index, y=recent, line=dict(color='#1e3a8a', width=1.5), name='Harga Historis'))
+        fig.add_trace(go.Scatter(x=forecast.index, y=forecast['Batas Atas'], line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=forecast.index, y=forecast['Batas Bawah'], fill='tonexty', line=dict(width=0),
+                                 fillcolor='rgba(255, 165, 0, 0.25)',
+                                 name=f'Interval {forecasting.CONFIDENCE:.0%}'))
+        fig.add_trace(go.Scatter(x=forecast.index, y=forecast['Prediksi'], line=dict(color='orange', width=2, dash='dash'),
+                                 name=f'Prediksi {model_name}'))
+        fig.update_layout(title=f'Prediksi {model_name} {ticker} ({len(forecast)} Hari Bursa)', yaxis_title='Harga (Rp)')
+        st.plotly_chart(fig, use_container_width=True)
+        return forecast
+
+    def display_price_simulation(self, ticker, close, horizon=21):
+        returns = np.log(close).diff().dropna()
+        if len(returns) < 30:
+            return None
+        
+        method = st.radio("Metode Simulasi", ["GBM", "Bootstrap Historis"], horizontal=True,
+                          key=f"mc_method_{ticker}")
+        simulator = MonteCarloSimulator(returns.to_numpy(), method='gbm' if method == "GBM" else 'bootstrap',
+                                        seed=MONTE_CARLO_SEED)
+        result = simulator.simulate([1.0], float(close.iloc[-1]), horizon=horizon, n_paths=MONTE_CARLO_PATHS)
+        
+        st.plotly_chart(fan_chart(result, f'Simulasi Monte Carlo {ticker} ({horizon} Hari Bursa)', 'Harga (Rp)'),
+                        use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        col1.metric("Median Harga Simulasi", f"Rp {result['percentiles']['P50'].iloc[-1]:,.0f}")
+        col2.metric("Probabilitas Rugi", f"{result['prob_loss_terminal'] * 100:.1f}%")
+        return result
+
+    def update_intraday(self, ticker):
+        # Indicator state survives reruns, so each refresh only feeds the new 5-minute bars
+        states = st.session_state.setdefault('intraday_indicators', {})
+        last_price, _, _, hist = self.yfinance_provider.get_realtime_data(ticker)
+        # get_realtime_data falls back to daily bars, which must not enter the 5-minute state
+        if hist is None or not indicators.is_intraday(hist.index):
+            return None
+        
+        state = states.setdefault(ticker, indicators.StreamingIndicators())
+        return state.update_many(hist['Close'])
+
+    def display_intraday(self, ticker):
+        latest = self.update_intraday(ticker)
+        if not latest:
+            st.warning("Data intraday tidak tersedia")
+            return
+        
+        st.write("#### Indikator Intraday (5 Menit)")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Harga", f"Rp {latest['Harga']:,.0f}")
+        col2.metric("RSI (Wilder)", f"{latest['RSI']:.1f}" if not np.isnan(latest['RSI']) else "N/A")
+        col3.metric("MACD", f"{latest['MACD']:+.2f}", f"Signal {latest['Signal']:+.2f}", delta_color="off")
+        col4.metric("MA20", f"Rp {latest['MA20']:,.0f}" if not np.isnan(latest['MA20']) else "N/A")
+
+    def get_signal_screen(self, tickers):
+        st.subheader("🚦 Screening Sinyal Teknikal Portofolio")
+        
+        with st.spinner("Menghitung indikator untuk seluruh portofolio..."):
+            close = self.yfinance_provider.get_close_matrix(tickers)
+        
+        if close.empty:
+            st.warning("Data historis tidak tersedia untuk screening")
+            return None
+        
+        screen = indicators.signal_screen(close)
+        st.dataframe(screen.style.format({
+            'Harga': 'Rp {:,.0f}',
+            'MA20': 'Rp {:,.0f}',
+            'MA50': 'Rp {:,.0f}',
+            'RSI': '{:.1f}',
+            'MACD Hist': '{:+.2f}',
+            'Bollinger Atas': 'Rp {:,.0f}',
+            'Bollinger Bawah': 'Rp {:,.0f}',
+            'Volatilitas': '{:.1f}%'
+        }), use_container_width=True)
+        return screen
+
     def _calculate_rsi(self, prices, window=14):
         delta = prices.diff()
         gain = (delta.where(delta > 0, 0)).fillna(0)
@@ -157,43 +273,22 @@ class StockAnalyzer:
             value=500000,
             format="%d"
         )
+        max_weight = st.slider("Batas Alokasi per Saham (%)", min_value=10, max_value=100,
+                               value=int(MAX_POSITION_WEIGHT * 100), step=5) / 100
         
-        valuation_scores = []
-        for ticker in portfolio_df['Ticker']:
-            clean_ticker = ticker.replace('.JK', '')
-            score = self.calculate_valuation_score(clean_ticker)
-            valuation_scores.append(score)
+        clean_tickers = portfolio_df['Ticker'].str.replace('.JK', '', regex=False)
+        ratios = self._get_ratios_frame(clean_tickers.unique().tolist())
+        scores = score_valuation(ratios, self.valuation_thresholds)
         
-        portfolio_df['Valuation Score'] = valuation_scores
+        portfolio_df['Valuation Score'] = clean_tickers.map(scores).fillna(0).astype(int)
         
         portfolio_df = portfolio_df.sort_values(by='Valuation Score', ascending=False)
         
-        total_score = portfolio_df['Valuation Score'].sum()
-        if total_score > 0:
-            portfolio_df['Allocation Weight'] = portfolio_df['Valuation Score'] / total_score
-        else:
-            portfolio_df['Allocation Weight'] = 1 / len(portfolio_df)
-        
-        portfolio_df['Allocation Amount'] = portfolio_df['Allocation Weight'] * investment_amount
-        portfolio_df['Additional Shares'] = (portfolio_df['Allocation Amount'] / portfolio_df['Current Price']).astype(int)
-        portfolio_df['Additional Investment'] = portfolio_df['Additional Shares'] * portfolio_df['Current Price']
-        
-        actual_investment = portfolio_df['Additional Investment'].sum()
-        
-        remaining_capital = investment_amount - actual_investment
-        
-        if remaining_capital > 0:
-            for idx, row in portfolio_df.iterrows():
-                if remaining_capital <= 0:
-                    break
-                current_price = row['Current Price']
-                if current_price <= remaining_capital:
-                    additional_shares = remaining_capital // current_price
-                    if additional_shares > 0:
-                        portfolio_df.at[idx, 'Additional Shares'] += additional_shares
-                        additional_investment = additional_shares * current_price
-                        portfolio_df.at[idx, 'Additional Investment'] += additional_investment
-                        remaining_capital -= additional_investment
+        # Whole IDX lots, score-weighted and capped per ticker
+        portfolio_df['Additional Lots'] = allocate_lots(portfolio_df['Current Price'], portfolio_df['Valuation Score'],
+                                                        investment_amount, max_weight=max_weight)
+        portfolio_df['Additional Shares'] = portfolio_df['Additional Lots'] * LOT_SIZE
+        portfolio_df['Additional Investment'] = (portfolio_df['Additional Shares'] * portfolio_df['Current Price']).fillna(0)
         
         portfolio_df['New Shares'] = portfolio_df['Lot Balance'] + portfolio_df['Additional Shares']
         portfolio_df['New Value'] = portfolio_df['New Shares'] * portfolio_df['Current Price']
@@ -204,10 +299,11 @@ class StockAnalyzer:
         
         st.write(f"### Rekomendasi Pembelian untuk Modal Rp {investment_amount:,.0f}")
         
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         col1.metric("Total Investasi Tambahan", f"Rp {total_new_investment:,.0f}")
         col2.metric("Total Nilai Portfolio Baru", f"Rp {total_new_value:,.0f}",
                     f"{((total_new_value - total_portfolio_value)/total_portfolio_value*100):+.2f}%")
+        col3.metric("Sisa Modal", f"Rp {investment_amount - total_new_investment:,.0f}")
         
         buy_recommendations = portfolio_df[portfolio_df['Additional Shares'] > 0].copy()
         buy_recommendations = buy_recommendations.sort_values(by='Additional Investment', ascending=False)
@@ -215,11 +311,12 @@ class StockAnalyzer:
         if not buy_recommendations.empty:
             buy_recommendations['Ranking'] = range(1, len(buy_recommendations) + 1)
             
-            rec_df = buy_recommendations[['Ranking', 'Ticker', 'Valuation Score', 'Current Price', 'Additional Shares', 'Additional Investment']]
+            rec_df = buy_recommendations[['Ranking', 'Ticker', 'Valuation Score', 'Current Price', 'Additional Lots', 'Additional Shares', 'Additional Investment']]
             
             rec_df = rec_df.rename(columns={
                 'Valuation Score': 'Skor Valuasi',
                 'Current Price': 'Harga Saat Ini',
+                'Additional Lots': 'Jumlah Lot',
                 'Additional Shares': 'Jumlah Pembelian',
                 'Additional Investment': 'Total Pembelian'
             })
@@ -255,107 +352,70 @@ class StockAnalyzer:
         
         return portfolio_df
 
+    def _get_ratios_frame(self, tickers):
+        # Snapshot first; only tickers it does not cover go to FMP
+        snapshot = get_snapshot()
+        frames = []
+        covered = set()
+        if snapshot is not None:
+            known = [ticker for ticker in tickers if ticker in snapshot]
+            frames.append(snapshot.rows(known, RATIO_FIELDS))
+            covered.update(known)
+        
+        missing = [ticker for ticker in tickers if ticker not in covered]
+        if missing:
+            bulk_data = self.fmp_provider.get_fmp_data_bulk(missing, ('ratios',))
+            live = {ticker: fmp_data['ratios'] for ticker, fmp_data in bulk_data.items() if fmp_data}
+            if live:
+                frames.append(pd.DataFrame.from_dict(live, orient='index'))
+        
+        if not frames:
+            return pd.DataFrame(columns=RATIO_FIELDS)
+        return pd.concat(frames)
+
     def calculate_valuation_score(self, ticker):
         try:
+            snapshot = get_snapshot()
+            if snapshot is not None and ticker in snapshot:
+                return self.score_ratios(snapshot.get_ratios(ticker))
+            
             fmp_data = self.fmp_provider.get_fmp_data(ticker)
             if not fmp_data:
                 return 0
             
-            ratios = fmp_data['ratios']
-            
-            per = ratios.get('priceEarningsRatio', 0)
-            pbv = ratios.get('priceToBookRatio', 0)
-            roe = ratios.get('returnOnEquity', 0) * 100
-            npm = ratios.get('netProfitMargin', 0) * 100
-            dividend_yield = ratios.get('dividendYield', 0) * 100
-            
-            score = 0
-            
-            if per > 0 and per < 15: score += 3
-            elif per < 20: score += 2
-            elif per < 25: score += 1
-                
-            if pbv > 0 and pbv < 1: score += 3
-            elif pbv < 1.5: score += 2
-            elif pbv < 2: score += 1
-                
-            if roe > 20: score += 3
-            elif roe > 15: score += 2
-            elif roe > 10: score += 1
-                
-            if npm > 20: score += 3
-            elif npm > 15: score += 2
-            elif npm > 10: score += 1
-                
-            if dividend_yield > 5: score += 3
-            elif dividend_yield > 3: score += 2
-            elif dividend_yield > 1: score += 1
-                
-            return score
+            return self.score_ratios(fmp_data['ratios'])
         
         except Exception as e:
             st.error(f"Error calculating valuation score: {str(e)}")
             return 0
 
+    def score_ratios(self, ratios):
+        try:
+            return int(score_valuation(pd.DataFrame([ratios]), self.valuation_thresholds).iloc[0])
+        except Exception as e:
+            st.error(f"Error calculating valuation score: {str(e)}")
+            return 0
+
     def get_undervalued_recommendations(self):
         st.subheader("🔍 Saham Undervalued Minggu Ini")
         
-        if not self.fmp_provider.api_key:
+        snapshot = get_snapshot()
+        if snapshot is None and not self.fmp_provider.api_key:
             st.warning("Silakan masukkan API Key FMP di sidebar untuk mengakses fitur ini")
             return []
         
         try:
-            indonesian_stocks_url = f"https://financialmodelingprep.com/api/v3/stock-screener?exchange=IDX&apikey={self.fmp_provider.api_key}"
-            response = requests.get(indonesian_stocks_url)
-            stocks_data = response.json()
-            
-            if not stocks_data:
-                st.warning("Tidak dapat menemukan data saham Indonesia")
-                return []
-            
-            filtered_stocks = [
-                stock for stock in stocks_data
-                if stock.get('marketCap', 0) > 1000000000000
-            ]
-            
-            selected_stocks = random.sample(filtered_stocks, min(20, len(filtered_stocks)))
-            
-            undervalued_stocks = []
-            
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i, stock in enumerate(selected_stocks):
-                ticker = stock['symbol']
-                status_text.text(f"Menganalisis {ticker} ({i+1}/{len(selected_stocks)})...")
-                
-                score = self.calculate_valuation_score(ticker)
-                
-                if score >= 8:
-                    fmp_data = self.fmp_provider.get_fmp_data(ticker)
-                    if not fmp_data:
-                        continue
-                    
-                    ratios = fmp_data.get('ratios', {})
-                    quote = fmp_data.get('quote', {})
-                    
-                    undervalued_stocks.append({
-                        'Ticker': ticker,
-                        'Nama': stock.get('companyName', ticker),
-                        'PER': ratios.get('priceEarningsRatio', 0),
-                        'PBV': ratios.get('priceToBookRatio', 0),
-                        'Dividend Yield': ratios.get('dividendYield', 0) * 100,
-                        'ROE': ratios.get('returnOnEquity', 0) * 100,
-                        'Skor': score,
-                        'Harga': quote.get('price', 0)
-                    })
-                
-                progress_bar.progress((i+1)/len(selected_stocks))
-            
-            status_text.text("Analisis selesai!")
+            if snapshot is not None:
+                built_at = pd.Timestamp(snapshot.built_at, unit='s').strftime('%d %b %Y %H:%M')
+                st.caption(f"Data fundamental dari snapshot {built_at} ({len(snapshot)} saham)")
+                undervalued_stocks = self._screen_snapshot(snapshot)
+            else:
+                undervalued_stocks = self._screen_live()
+                if undervalued_stocks is None:
+                    return []
             
             if undervalued_stocks:
-                undervalued_stocks.sort(key=lambda x: x['Skor'], reverse=True)
+                undervalued_stocks.sort(key=lambda x: (-x['Skor'], x['Ticker']))
                 
                 st.success(f"Ditemukan {len(undervalued_stocks)} saham undervalued!")
                 
@@ -382,6 +442,91 @@ class StockAnalyzer:
             st.error(f"Error dalam mendapatkan rekomendasi saham undervalued: {str(e)}")
             return []
 
+    def _screen_snapshot(self, snapshot):
+        # Two index lookups on the snapshot, no API calls
+        candidates = snapshot.query('score', '>=', 8)
+        large_caps = snapshot.query('mktCap', '>', 1000000000000).index
+        candidates = candidates[candidates.index.isin(large_caps)].fillna(0)
+        
+        return [{
+            'Ticker': ticker,
+            'Nama': row['companyName'] or ticker,
+            'PER': row['priceEarningsRatio'],
+            'PBV': row['priceToBookRatio'],
+            'Dividend Yield': row['dividendYield'] * 100,
+            'ROE': row['returnOnEquity'] * 100,
+            'Skor': int(row['score']),
+            'Harga': row['price']
+        } for ticker, row in candidates.iterrows()]
+
+    def _screen_live(self):
+        stocks_data = self.fmp_provider.get_stock_screener('IDX')
+        
+        if not stocks_data:
+            st.warning("Tidak dapat menemukan data saham Indonesia")
+            return None
+        
+        company_names = {
+            stock['symbol']: stock.get('companyName', stock['symbol'])
+            for stock in stocks_data
+            if stock.get('marketCap', 0) > 1000000000000
+        }
+        tickers = sorted(company_names)
+        chunks = [tickers[i:i + SCREENER_CHUNK_SIZE] for i in range(0, len(tickers), SCREENER_CHUNK_SIZE)]
+        
+        undervalued_stocks = []
+        analyzed = 0
+        
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        live_table = st.empty()
+        
+        # Workers only fetch; scoring and all page updates stay on the script thread
+        with ThreadPoolExecutor(max_workers=SCREENER_WORKERS) as executor:
+            futures = {
+                executor.submit(self.fmp_provider.fetch_fmp_data_bulk, chunk, ('ratios', 'quote')): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    bulk_data = future.result()
+                except Exception as e:
+                    st.error(f"Error menganalisis {', '.join(chunk)}: {str(e)}")
+                    bulk_data = {}
+                
+                found = {ticker: fmp_data for ticker, fmp_data in bulk_data.items() if fmp_data}
+                if found:
+                    scores = score_valuation(
+                        pd.DataFrame.from_dict({ticker: data['ratios'] for ticker, data in found.items()},
+                                               orient='index'),
+                        self.valuation_thresholds
+                    )
+                    
+                    for ticker, score in scores[scores >= 8].items():
+                        ratios = found[ticker].get('ratios', {})
+                        quote = found[ticker].get('quote', {})
+                        undervalued_stocks.append({
+                            'Ticker': ticker,
+                            'Nama': company_names[ticker],
+                            'PER': ratios.get('priceEarningsRatio', 0),
+                            'PBV': ratios.get('priceToBookRatio', 0),
+                            'Dividend Yield': ratios.get('dividendYield', 0) * 100,
+                            'ROE': ratios.get('returnOnEquity', 0) * 100,
+                            'Skor': int(score),
+                            'Harga': quote.get('price', 0)
+                        })
+                
+                analyzed += len(chunk)
+                progress_bar.progress(analyzed / len(tickers))
+                status_text.text(f"Menganalisis {analyzed}/{len(tickers)} saham...")
+                if undervalued_stocks:
+                    live_table.dataframe(pd.DataFrame(undervalued_stocks), use_container_width=True)
+        
+        live_table.empty()
+        status_text.text("Analisis selesai!")
+        return undervalued_stocks
+
     def stock_comparison(self, portfolio_df=pd.DataFrame()):
         st.subheader("📊 Komparasi Saham")
         st.info("Bandingkan saham dari portofolio Anda dengan saham lainnya di pasar Indonesia")
@@ -415,14 +560,22 @@ class StockAnalyzer:
         comparison_data = []
         
         with st.spinner("Mengumpulkan data saham..."):
+            bulk_data = self.fmp_provider.get_fmp_data_bulk(
+                [ticker.replace('.JK', '') for ticker in all_tickers]
+            )
+            last_prices = self.yfinance_provider.get_realtime_data_bulk(all_tickers)['Last Price']
+            sentiments = self.get_stock_sentiments(all_tickers)
+            
             for ticker in all_tickers:
                 clean_ticker = ticker.replace('.JK', '')
                 
-                fmp_data = self.fmp_provider.get_fmp_data(clean_ticker)
+                fmp_data = bulk_data.get(clean_ticker)
                 
-                sentiment_score = self.get_stock_sentiment(ticker)
+                sentiment_score = sentiments.get(ticker, 0)
                 
-                last_price, _, _, _ = self.yfinance_provider.get_realtime_data(ticker)
+                last_price = last_prices.get(ticker)
+                if pd.isna(last_price):
+                    last_price = None
                 
                 if fmp_data and 'profile' in fmp_data:
                     profile = fmp_data.get('profile', {})
@@ -473,14 +626,33 @@ class StockAnalyzer:
                 st.plotly_chart(fig, use_container_width=True, key=f"chart_{metric}")
 
     def get_stock_sentiment(self, ticker):
-        news_provider = NewsProvider()
-        sentiment_analyzer = SentimentAnalyzer(news_provider)
-        articles = news_provider.get_news_from_yahoo(ticker)
-        sentiment_scores = []
-        
-        for article in articles[:5]:
-            text = f"{article['title']}. {article['description']}"
-            sentiment = sentiment_analyzer.analyze_text(text)
-            sentiment_scores.append(sentiment['combined_score'])
-        
-        return np.mean(sentiment_scores) if sentiment_scores else 0
\ No newline at end of file
+        return self.get_stock_sentiments([ticker])[ticker]
+
+    def get_stock_sentiments(self, tickers):
+        """Average headline sentiment per ticker; feeds are fetched concurrently"""
+        # Tickers kept fresh by news_daemon.py are answered from the index without any fetch
+        scores = {}
+        for ticker in tickers:
+            summary = sentiment_index.get_summary(ticker)
+            if summary and summary['articles']:
+                scores[ticker] = summary['score']
+        tickers = [ticker for ticker in tickers if ticker not in scores]
+        if not tickers:
+            return scores
+        
+        # Built once and reused; resources.get_stock_analyzer passes the process-wide instances
+        if self.sentiment_analyzer is None:
+            from news_provider import NewsProvider
+            from sentiment_analyzer import SentimentAnalyzer
+            self.news_provider = self.news_provider or NewsProvider()
+            self.sentiment_analyzer = SentimentAnalyzer(self.news_provider)
+        
+        news = self.news_provider.get_news_from_yahoo_bulk(tickers)
+        texts = {ticker: [f"{article['title']}. {article['description']}" for article in articles[:5]]
+                 for ticker, articles in news.items()}
+        sentiments = iter(self.sentiment_analyzer.analyze_many([text for group in texts.values() for text in group]))
+        
+        for ticker, group in texts.items():
+            sentiment_scores = [next(sentiments)['combined_score'] for _ in group]
+            scores[ticker] = np.mean(sentiment_scores) if sentiment_scores else 0
+        return scores
\ No newline at end of file
@@ -0,0 +1,19 @@
+import os
+
+# Local state (caches, history, snapshots) lives here; override with KILO_DATA_DIR
+DATA_DIR = os.environ.get(
+    "KILO_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+
+
+def data_path(*parts):
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def data_dir(*parts):
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
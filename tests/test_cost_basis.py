@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cost_basis import match_lots, performance, xirr
+
+
+def _ledger(rows):
+    return pd.DataFrame(rows, columns=['Date', 'Ticker', 'Action', 'Shares', 'Price'])
+
+
+TRADES = _ledger([
+    ('2024-01-02', 'BBCA', 'Beli', 100, 1000),
+    ('2024-01-12', 'BBCA', 'Beli', 100, 1200),
+    ('2024-02-01', 'BBCA', 'Jual', 150, 1500),
+])
+
+
+def test_fifo_matches_oldest_lots_first():
+    matched = match_lots(TRADES, 'FIFO')
+    sale = matched['realized'].iloc[0]
+    # 100 @ 1000 and 50 @ 1200 leave the lot bought on 2024-01-12
+    assert sale['Cost Basis'] == 100 * 1000 + 50 * 1200
+    assert sale['Realized P/L'] == 150 * 1500 - 160000
+    assert sale['Holding Days'] == (100 * 30 + 50 * 20) / 150
+
+    result = performance(matched, {'BBCA': 1300}, as_of='2024-03-01')
+    position = result['open'].iloc[0]
+    assert (position['Shares'], position['Cost Basis'], position['Avg Price']) == (50, 60000, 1200)
+    assert position['Unrealized P/L'] == 50 * (1300 - 1200)
+    assert position['Holding Days'] == 49
+    assert result['unmatched_shares'] == 0
+
+
+def test_average_cost_pools_the_lots():
+    matched = match_lots(TRADES, 'Average Cost')
+    sale = matched['realized'].iloc[0]
+    assert sale['Cost Basis'] == 150 * 1100
+    assert sale['Realized P/L'] == 150 * 1500 - 165000
+
+    result = performance(matched, {'BBCA': 1300}, as_of='2024-03-01')
+    position = result['open'].iloc[0]
+    assert (position['Shares'], position['Cost Basis'], position['Avg Price']) == (50, 55000, 1100)
+    assert result['realized_pl'] + result['unrealized_pl'] == 60000 + 50 * (1300 - 1100)
+
+
+def test_sell_beyond_holdings_is_booked_at_zero_profit():
+    matched = match_lots(_ledger([
+        ('2024-01-02', 'TLKM', 'Beli', 100, 1000),
+        ('2024-02-01', 'TLKM', 'Jual', 150, 1200),
+    ]), 'FIFO')
+    sale = matched['realized'].iloc[0]
+    # Only the 100 shares held are matched; the other 50 carry their own sale price as cost
+    assert sale['Cost Basis'] == 100 * 1000 + 50 * 1200
+    assert sale['Realized P/L'] == 100 * (1200 - 1000)
+    assert matched['unmatched_shares'] == 50
+    assert matched['open'].empty
+
+
+def test_empty_ledger():
+    for method in ('FIFO', 'Average Cost'):
+        result = performance(match_lots(_ledger([]), method), as_of='2024-03-01')
+        assert result['open'].empty and result['realized'].empty
+        assert result['realized_pl'] == 0 and result['unrealized_pl'] == 0 and result['market_value'] == 0
+        assert result['twr'] == 0
+        assert np.isnan(result['xirr'])
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        match_lots(TRADES, 'LIFO')
+
+
+def test_time_weighted_return_ignores_flow_size():
+    # +10% on the first 100 shares, then +10% again after doubling the position
+    matched = match_lots(_ledger([
+        ('2024-01-02', 'BBCA', 'Beli', 100, 1000),
+        ('2024-02-01', 'BBCA', 'Beli', 100, 1100),
+        ('2024-03-01', 'BBCA', 'Jual', 200, 1210),
+    ]), 'FIFO')
+    assert np.isclose(performance(matched, as_of='2024-03-01')['twr'], 1.1 * 1.1 - 1)
+
+
+def test_xirr_newton():
+    assert np.isclose(xirr([0, 365], [-100, 150]), 0.5)
+    assert np.isclose(xirr([0, 730], [-100, 121]), 0.1)
+
+
+def test_xirr_bisection_fallback():
+    # Newton from 10% steps below -100% on a near-total loss, so the bracket search answers
+    assert np.isclose(xirr([0, 365], [-100, 10]), -0.9)
+    assert np.isclose(xirr([0, 365], [-100, 1]), -0.99)
+
+
+def test_xirr_undefined_without_both_signs():
+    assert np.isnan(xirr([0, 365], [-100, -10]))
+    assert np.isnan(xirr([0], [-100]))
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import indicators
+from stock_analyzer import StockAnalyzer
+
+
+def _prices(n=300, columns=3, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2023-01-02', periods=n)
+    prices = pd.DataFrame(1000 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, columns)), axis=0)),
+                          index=index, columns=[f"T{i}" for i in range(columns)])
+    # Flat stretch: zero gains and losses hit the 1e-10 floor in both versions
+    prices.iloc[40:60, 0] = prices.iloc[40, 0]
+    return prices
+
+
+def _reference():
+    # The pandas methods do not touch the analyzer's providers
+    return StockAnalyzer.__new__(StockAnalyzer)
+
+
+def test_rsi_matches_pandas_reference():
+    prices = _prices()
+    vectorized = indicators.rsi(prices)
+    for column in prices:
+        expected = _reference()._calculate_rsi(prices[column])
+        pd.testing.assert_series_equal(vectorized[column], expected, check_names=False, rtol=1e-9, atol=1e-9)
+
+
+def test_macd_matches_pandas_reference():
+    prices = _prices()
+    line, signal = indicators.macd(prices)
+    for column in prices:
+        expected_line, expected_signal = _reference()._calculate_macd(prices[column])
+        pd.testing.assert_series_equal(line[column], expected_line, check_names=False, rtol=1e-9, atol=1e-9)
+        pd.testing.assert_series_equal(signal[column], expected_signal, check_names=False, rtol=1e-9, atol=1e-9)
+
+
+def test_sma_matches_pandas_rolling():
+    prices = _prices()
+    for window in (20, 50):
+        pd.testing.assert_frame_equal(indicators.sma(prices, window), prices.rolling(window).mean(),
+                                      rtol=1e-9, atol=1e-9)
+
+
+def test_streaming_revisions_match_final_bars():
+    close = _prices(columns=1)['T0']
+    rng = np.random.default_rng(1)
+
+    revised = indicators.StreamingIndicators()
+    for timestamp, price in close.items():
+        # An open bar is revised a few times before it settles at its final price
+        for intermediate in price * (1 + rng.normal(0, 0.01, 3)):
+            revised.update(timestamp, float(intermediate))
+        latest = revised.update(timestamp, float(price))
+    assert revised.update(close.index[0], 1.0) == latest
+
+    final = indicators.StreamingIndicators()
+    final.update_many(close)
+    for key, value in final.latest.items():
+        assert np.isclose(latest[key], value, rtol=1e-9, atol=1e-9), key
+
+    line, signal = indicators.macd(close)
+    assert np.isclose(latest['MA20'], indicators.sma(close, 20).iloc[-1])
+    assert np.isclose(latest['MA50'], indicators.sma(close, 50).iloc[-1])
+    assert np.isclose(latest['MACD'], line.iloc[-1])
+    assert np.isclose(latest['Signal'], signal.iloc[-1])
+
+
+def test_daily_fallback_bars_are_not_intraday():
+    bars = pd.date_range('2024-03-01 09:00', periods=12, freq='5min', tz='Asia/Jakarta')
+    # The IDX lunch break leaves a gap, the spacing is still five minutes
+    assert indicators.is_intraday(bars.delete([5, 6]))
+    assert indicators.is_intraday(bars[:1])
+    daily = pd.bdate_range('2024-03-01', periods=3, tz='Asia/Jakarta')
+    assert not indicators.is_intraday(daily)
+    assert not indicators.is_intraday(daily[:1])
@@ -0,0 +1,93 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import storage
+from ledger import TransactionLedger, get_ledger, parse_broker_csv
+
+
+def _export(text, name='export.csv'):
+    source = io.StringIO(text)
+    source.name = name
+    return source
+
+
+def test_indonesian_export():
+    df = parse_broker_csv(_export(
+        'Tanggal;Kode Saham;Jenis;Lot;Harga\n'
+        '10/03/2024;BBCA;B;2;"Rp 9.000"\n'
+        '01/12/2024;TLKM;S;1;"4.000"\n'
+        '02/12/2024;TLKM;B;3;"3.512,50"\n'
+    ))
+    assert df['Date'].tolist() == [pd.Timestamp('2024-03-10'), pd.Timestamp('2024-12-01'),
+                                   pd.Timestamp('2024-12-02')]
+    assert df['Ticker'].tolist() == ['BBCA', 'TLKM', 'TLKM']
+    assert df['Action'].tolist() == ['Beli', 'Jual', 'Beli']
+    assert df['Shares'].tolist() == [200, 100, 300]
+    assert df['Price'].tolist() == [9000, 4000, 3512.5]
+
+
+def test_iso_english_export():
+    df = parse_broker_csv(_export(
+        'Trade Date,Symbol,Side,Quantity,Price,Trade ID\n'
+        '2024-03-10,BBCA.JK,Buy,200,"9,000",T1\n'
+        '2024-12-01,TLKM.JK,Sell,100,4000.5,T2\n'
+    ))
+    assert df['Date'].tolist() == [pd.Timestamp('2024-03-10'), pd.Timestamp('2024-12-01')]
+    assert df['Action'].tolist() == ['Beli', 'Jual']
+    assert df['Shares'].tolist() == [200, 100]
+    assert df['Price'].tolist() == [9000, 4000.5]
+
+
+def test_import_is_idempotent_and_balances_back_dated_rows(tmp_path):
+    ledger = TransactionLedger(str(tmp_path / 'ledger.sqlite3'))
+    ledger.add('2024-03-01', 'BBCA', 'Beli', 100, 9000)
+    export = ('Tanggal;Kode Saham;Jenis;Lot;Harga\n'
+              '01/02/2024;TLKM;B;2;"3.500"\n01/02/2024;TLKM;B;2;"3.500"\n10/03/2024;TLKM;S;1;"3.800"\n')
+
+    assert ledger.import_csv(_export(export)) == 3
+    assert ledger.import_csv(_export(export)) == 0
+
+    transactions = ledger.transactions()
+    assert transactions['Date'].tolist() == ['2024-02-01', '2024-02-01', '2024-03-01', '2024-03-10']
+    assert np.allclose(transactions['Cumulative'], transactions['Amount'].cumsum())
+    assert ledger.summary()['balance'] == 700000 * 2 + 900000 - 380000
+
+
+def test_import_skips_trades_entered_by_hand(tmp_path):
+    ledger = TransactionLedger(str(tmp_path / 'ledger.sqlite3'))
+    ledger.add('2024-02-01', 'TLKM', 'Beli', 200, 3500)
+    # A second identical fill on the same day is a separate trade
+    ledger.add('2024-02-01', 'tlkm', 'Beli', 200, 3500)
+    export = ('Tanggal;Kode Saham;Jenis;Lot;Harga\n'
+              '01/02/2024;TLKM;B;2;"3.500"\n01/02/2024;TLKM;B;2;"3.500"\n01/02/2024;TLKM;B;2;"3.500"\n'
+              '10/03/2024;TLKM;S;1;"3.800"\n')
+
+    assert ledger.import_csv(_export(export)) == 2
+    assert ledger.summary()['transactions'] == 4
+    assert ledger.summary()['balance'] == 700000 * 3 - 380000
+
+
+def test_ledgers_are_separate_per_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    first, second = get_ledger('alice kopi pagi 2024'), get_ledger('bob/../teh-sore-2024')
+    first.add('2024-03-01', 'BBCA', 'Beli', 100, 9000)
+
+    assert get_ledger('alice kopi pagi 2024') is first
+    assert first.summary()['transactions'] == 1
+    assert second.summary()['transactions'] == 0
+    # Files are named by hash, so neither the id nor a path in it reaches the file system
+    names = [name for name in os.listdir(tmp_path / 'ledgers') if name.endswith('.sqlite3')]
+    assert len(names) == 2 and all(len(name) == 64 + len('.sqlite3') for name in names)
+    with pytest.raises(ValueError):
+        get_ledger('bob1')
+
+
+def test_manual_tickers_are_upper_cased(tmp_path):
+    ledger = TransactionLedger(str(tmp_path / 'ledger.sqlite3'))
+    ledger.add('2024-03-01', 'bbca', 'Beli', 100, 9000)
+    ledger.add('2024-03-02', ' BBCA ', 'Beli', 100, 9100)
+
+    assert ledger.positions()['Ticker'].tolist() == ['BBCA']
+    assert ledger.cost_basis()['open']['Shares'].tolist() == [200]
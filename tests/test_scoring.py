@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from scoring import RISK_THRESHOLDS, VALUATION_THRESHOLDS, score_risk, score_valuation
+
+BOUNDARIES = {
+    'priceEarningsRatio': [-10, -1e-9, 0, 1e-9, 14.999, 15, 15.001, 20, 25, 25.001, 100],
+    'priceToBookRatio': [-1, 0, 0.5, 1, 1.0001, 1.5, 2, 2.0001, 10],
+    'returnOnEquity': [-0.2, 0, 0.1, 0.10001, 0.15, 0.2, 0.20001, 1],
+    'netProfitMargin': [-0.2, 0, 0.1, 0.10001, 0.15, 0.2, 0.20001, 1],
+    'dividendYield': [0, 0.01, 0.01001, 0.03, 0.05, 0.05001, 0.2],
+}
+
+
+def _scalar_score(ratios):
+    # The if/elif chains StockAnalyzer.score_ratios used before the threshold tables
+    per = ratios.get('priceEarningsRatio', 0)
+    pbv = ratios.get('priceToBookRatio', 0)
+    roe = ratios.get('returnOnEquity', 0) * 100
+    npm = ratios.get('netProfitMargin', 0) * 100
+    dividend_yield = ratios.get('dividendYield', 0) * 100
+
+    score = 0
+
+    if per > 0 and per < 15: score += 3
+    elif per < 20: score += 2
+    elif per < 25: score += 1
+
+    if pbv > 0 and pbv < 1: score += 3
+    elif pbv < 1.5: score += 2
+    elif pbv < 2: score += 1
+
+    if roe > 20: score += 3
+    elif roe > 15: score += 2
+    elif roe > 10: score += 1
+
+    if npm > 20: score += 3
+    elif npm > 15: score += 2
+    elif npm > 10: score += 1
+
+    if dividend_yield > 5: score += 3
+    elif dividend_yield > 3: score += 2
+    elif dividend_yield > 1: score += 1
+
+    return score
+
+
+def _random_ratios(n, seed=0):
+    rng = np.random.default_rng(seed)
+    scales = {'priceEarningsRatio': 40, 'priceToBookRatio': 4, 'returnOnEquity': 0.4,
+              'netProfitMargin': 0.4, 'dividendYield': 0.1}
+    rows = []
+    for _ in range(n):
+        row = {}
+        for column, scale in scales.items():
+            draw = rng.random()
+            if draw < 0.1:
+                continue  # missing from the FMP response
+            if draw < 0.5:
+                row[column] = float(rng.choice(BOUNDARIES[column]))
+            else:
+                row[column] = float(rng.normal(scale / 2, scale))
+        rows.append(row)
+    return rows
+
+
+def test_matches_scalar_scoring():
+    rows = _random_ratios(20000)
+    vectorized = score_valuation(pd.DataFrame(rows, columns=list(VALUATION_THRESHOLDS)))
+    expected = [_scalar_score(row) for row in rows]
+    mismatches = np.flatnonzero(vectorized.to_numpy() != np.array(expected))
+    assert mismatches.size == 0, [rows[i] for i in mismatches[:5]]
+
+
+def test_boundary_points():
+    def points(column, values):
+        return score_valuation(pd.DataFrame({column: values}), {column: VALUATION_THRESHOLDS[column]}).tolist()
+
+    # Non-positive PER and PBV fall through to the second branch of the old chain
+    assert points('priceEarningsRatio', [-5, 0, 10, 15, 20, 25]) == [2, 2, 3, 2, 1, 0]
+    assert points('priceToBookRatio', [-1, 0, 0.5, 1, 1.5, 2]) == [2, 2, 3, 2, 1, 0]
+    assert points('returnOnEquity', [0.1, 0.12, 0.16, 0.25]) == [0, 1, 2, 3]
+    assert points('dividendYield', [0.01, 0.02, 0.04, 0.06]) == [0, 1, 2, 3]
+
+
+def test_missing_ratios_score_like_zero():
+    assert score_valuation(pd.DataFrame([{}], columns=list(VALUATION_THRESHOLDS))).iloc[0] == _scalar_score({})
+
+
+RISK_BOUNDARIES = {
+    'beta': [-1, 0, 1.0, 1.0001, 1.2, 1.2001, 1.5, 1.5001, 3],
+    'change': [-6, -5, -3.0001, -3, -1, 0, 1, 1.0001, 3, 3.0001, 5, 5.0001],
+    'priceEarningsRatio': [-5, 0, 15, 20, 20.0001, 25, 25.0001, 80],
+    'debtEquityRatio': [0, 0.5, 1.0, 1.0001, 1.5, 1.5001, 2.0, 2.0001, 5],
+    'mktCap': [0, 4.999e11, 5e11, 5.001e11, 1e12, 1.0001e12, 5e12, 5.0001e12, 1e14],
+}
+RISK_DEFAULTS = {'beta': 1.0, 'change': 0, 'priceEarningsRatio': 15, 'debtEquityRatio': 0.5, 'mktCap': 1e12}
+
+
+def _scalar_risk_score(factors):
+    # The if/elif chains RiskProfiler.calculate_portfolio_risk_score used before RISK_THRESHOLDS
+    beta = factors.get('beta', 1.0)
+    vol = factors.get('change', 0)
+    per = factors.get('priceEarningsRatio', 15)
+    der = factors.get('debtEquityRatio', 0.5)
+    size = factors.get('mktCap', 1000000000000)
+
+    risk_score = 0
+
+    if beta > 1.5: risk_score += 3
+    elif beta > 1.2: risk_score += 2
+    elif beta > 1.0: risk_score += 1
+
+    if abs(vol) > 5: risk_score += 3
+    elif abs(vol) > 3: risk_score += 2
+    elif abs(vol) > 1: risk_score += 1
+
+    if per > 25: risk_score += 2
+    elif per > 20: risk_score += 1
+
+    if der > 2.0: risk_score += 3
+    elif der > 1.5: risk_score += 2
+    elif der > 1.0: risk_score += 1
+
+    if size < 500000000000: risk_score += 3
+    elif size < 1000000000000: risk_score += 2
+    elif size < 5000000000000: risk_score += 1
+
+    return min(10, risk_score)
+
+
+def _random_factors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {}
+        for column, values in RISK_BOUNDARIES.items():
+            draw = rng.random()
+            if draw < 0.1:
+                continue  # missing from the FMP profile/quote/ratios
+            if draw < 0.5:
+                row[column] = float(rng.choice(values))
+            else:
+                row[column] = float(rng.uniform(min(values), max(values)))
+        rows.append(row)
+    return rows
+
+
+def test_risk_matches_scalar_scoring():
+    rows = _random_factors(20000)
+    vectorized = score_risk(pd.DataFrame(rows, columns=list(RISK_THRESHOLDS)))
+    expected = [_scalar_risk_score(row) for row in rows]
+    mismatches = np.flatnonzero(np.asarray(vectorized) != np.array(expected))
+    assert mismatches.size == 0, [rows[i] for i in mismatches[:5]]
+
+
+def test_risk_boundary_points():
+    def points(column, values):
+        frame = pd.DataFrame({**RISK_DEFAULTS, column: values})
+        baseline = _scalar_risk_score({})
+        return (np.asarray(score_risk(frame)) - baseline).tolist()
+
+    # Defaults alone score 1 (a 1e12 market cap is below the 5e12 edge)
+    assert _scalar_risk_score({}) == 1
+    assert points('beta', [1.0, 1.1, 1.2, 1.3, 1.5, 1.6]) == [0, 1, 1, 2, 2, 3]
+    assert points('change', [-5.5, -5, -1, 1, 3, 3.5]) == [3, 2, 0, 0, 1, 2]
+    assert points('priceEarningsRatio', [20, 21, 25, 26]) == [0, 1, 1, 2]
+    assert points('debtEquityRatio', [1.0, 1.5, 2.0, 2.1]) == [0, 1, 2, 3]
+    assert points('mktCap', [4e11, 5e11, 1e12, 5e12]) == [2, 1, 0, -1]
+
+
+def test_risk_score_is_capped():
+    worst = {'beta': 2, 'change': 9, 'priceEarningsRatio': 50, 'debtEquityRatio': 3, 'mktCap': 1e9}
+    assert score_risk(pd.DataFrame([worst])).iloc[0] == _scalar_risk_score(worst) == 10
+
+
+def test_missing_factors_use_scalar_defaults():
+    assert score_risk(pd.DataFrame([{}], columns=list(RISK_THRESHOLDS))).iloc[0] == _scalar_risk_score({})
@@ -216,3 +216,39 @@ class UIHelper:
         selected_menu = st.sidebar.selectbox("Pilih Fitur:", menu_options)
         
         return selected_menu, uploaded_file
+
+    def display_ledger_selector(self):
+        """Sidebar input for the transaction ledger id.
+
+        Returns (ledger or None, whether the user chose it as the portfolio source).
+        """
+        from ledger import LEDGER_ID_MIN_LENGTH, SHARED_LEDGER_DB, get_ledger
+        
+        st.sidebar.header("Ledger Transaksi")
+        if SHARED_LEDGER_DB:
+            st.sidebar.caption("Mode satu pengguna: semua sesi memakai ledger yang sama")
+            ledger = get_ledger()
+        else:
+            ledger_id = st.sidebar.text_input("ID Ledger", type="password", key="ledger_id",
+                                              help=f"Riwayat transaksi disimpan per ID. Gunakan frasa rahasia minimal "
+                                                   f"{LEDGER_ID_MIN_LENGTH} karakter yang hanya Anda ketahui.")
+            if not ledger_id:
+                return None, False
+            try:
+                ledger = get_ledger(ledger_id.strip())
+            except ValueError as e:
+                st.sidebar.error(str(e))
+                return None, False
+        
+        use_ledger = st.sidebar.checkbox("Gunakan ledger sebagai portfolio", value=False, key="use_ledger_portfolio",
+                                         help="Dipakai hanya jika tidak ada file portfolio yang di-upload")
+        return ledger, use_ledger
+
+    def display_cache_stats(self, stats):
+        """Shows hit/miss counters of the FMP cache in the sidebar"""
+        with st.sidebar.expander("Statistik Cache FMP"):
+            st.write(f"Hit memori: {stats['memory_hits']}")
+            st.write(f"Hit disk: {stats['disk_hits']}")
+            st.write(f"Miss: {stats['misses']}")
+            st.write(f"Hit rate: {stats['hit_rate']:.0%}")
+            st.write(f"Entri di memori: {stats['entries']}")
@@ -1,33 +1,45 @@
-import yfinance as yf
+import pandas as pd
 import streamlit as st
-import time
 from data_provider import DataProvider
+from history_store import history_store
+from rate_limiter import get_limiter, call_with_backoff, is_rate_limit_error
+
+REALTIME_COLUMNS = ['Last Price', 'Previous Close', 'Change', 'Change %']
 
 class YFinanceProvider(DataProvider):
+    def __init__(self, store=history_store):
+        self.limiter = get_limiter('yahoo')
+        self.store = store
+
     def get_data(self, **kwargs):
         # This method is not used directly, but required by the abstract class
         pass
 
+    def _history(self, stock, **kwargs):
+        return call_with_backoff(self.limiter, stock.history, **kwargs)
+
     def get_realtime_data(self, ticker):
         try:
-            time.sleep(0.5)  # Delay 500ms between requests
-            
+            import yfinance as yf
             stock = yf.Ticker(ticker)
             
             try:
-                hist = stock.history(period="1d", interval="5m")
+                hist = self._history(stock, period="1d", interval="5m")
             except Exception as e:
-                hist = stock.history(period="1d", interval="1d")
+                if is_rate_limit_error(e):
+                    raise
+                hist = self._history(stock, period="1d", interval="1d")
             
             if hist.empty:
-                hist = stock.history(period="1d")
+                hist = self._history(stock, period="1d")
                 if hist.empty:
                     return None, None, None, None
             
             last_price = hist['Close'].iloc[-1]
             
             try:
-                prev_close = stock.info.get('previousClose', last_price)
+                info = call_with_backoff(self.limiter, lambda: stock.info)
+                prev_close = info.get('previousClose', last_price)
             except:
                 prev_close = hist['Open'].iloc[0] if not hist.empty else last_price
             
@@ -37,31 +49,67 @@ class YFinanceProvider(DataProvider):
             return last_price, change, change_percent, hist
             
         except Exception as e:
-            if "Too Many Requests" in str(e) or "429" in str(e):
+            if is_rate_limit_error(e):
                 st.warning("Yahoo Finance rate limit terlampaui. Data mungkin tidak real-time.")
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="1d")
-                    if not hist.empty:
-                        last_price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else hist['Open'].iloc[0]
-                        change = last_price - prev_close
-                        change_percent = (change / prev_close) * 100
-                        return last_price, change, change_percent, hist
-                except:
-                    pass
+                return None, None, None, None
             
             st.error(f"Error fetching data: {str(e)}")
             return None, None, None, None
 
     def get_stock_history(self, ticker, period="1y"):
         try:
+            import yfinance as yf
             stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            if hist.empty:
+            hist = self.store.get_history(ticker, period, lambda **kwargs: self._history(stock, **kwargs))
+            if hist is None or hist.empty:
                 st.warning(f"Data tidak ditemukan untuk {ticker}")
                 return None
             return hist
         except Exception as e:
             st.error(f"Error fetching history for {ticker}: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_close_matrix(self, tickers, period="1y"):
+        """Closing prices as a dates x tickers frame, built from the history store"""
+        closes = {}
+        for ticker in dict.fromkeys(tickers):
+            hist = self.get_stock_history(ticker, period)
+            if hist is not None:
+                closes[ticker] = hist['Close']
+        return pd.DataFrame(closes)
+
+    def get_realtime_data_bulk(self, tickers):
+        """Last price, previous close and change for many tickers from one download"""
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return pd.DataFrame(columns=REALTIME_COLUMNS)
+        
+        try:
+            import yfinance as yf
+            data = call_with_backoff(self.limiter, yf.download, tickers, period="5d", interval="1d",
+                                     group_by="column", auto_adjust=False, progress=False, threads=True)
+        except Exception as e:
+            st.error(f"Error fetching data: {str(e)}")
+            return pd.DataFrame(index=tickers, columns=REALTIME_COLUMNS, dtype=float)
+        
+        if data is None or data.empty:
+            return pd.DataFrame(index=tickers, columns=REALTIME_COLUMNS, dtype=float)
+        
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        close = close.reindex(columns=tickers)
+        
+        # Number the valid bars from the end: 1 is the latest, 2 the previous close
+        valid = close.notna()
+        rank_from_end = valid[::-1].cumsum()[::-1]
+        last_price = close.where(valid & (rank_from_end == 1)).max()
+        prev_close = close.where(valid & (rank_from_end == 2)).max().fillna(last_price)
+        
+        quotes = pd.DataFrame({
+            'Last Price': last_price,
+            'Previous Close': prev_close,
+            'Change': last_price - prev_close
+        })
+        quotes['Change %'] = quotes['Change'] / quotes['Previous Close'] * 100
+        return quotes